@@ -0,0 +1,216 @@
+"""
+Headless self-play arena for the tic-tac-toe engines.
+
+Plays every pairing of the chosen engines against each other in a process
+pool, checks that perfect engines never lose (and always draw against each
+other), and prints nodes searched, per-move latency and outcomes as JSON.
+
+Usage: python arena.py [--games N] [--engines a,b,...] [--workers N]
+                       [--seed S] [--output FILE]
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+import mcts
+import tictactoe as ttt
+
+# Engines that play perfectly, any game between two of them must be a draw
+PERFECT = {"minimax", "pruned", "cached"}
+
+# Number of boards generated with `result` since the counter was last read
+nodes = 0
+
+
+def random_move(board, rng):
+    return rng.choice(sorted(ttt.actions(board)))
+
+
+ENGINES = {
+    "minimax": lambda board, rng: ttt.minimax(board),
+    "pruned": lambda board, rng: ttt.minimax_pruned(board),
+    "cached": lambda board, rng: ttt.minimax_cached(board),
+    "random": random_move,
+    "mcts": lambda board, rng: mcts.MCTS(iterations=1000, heuristic=True,
+                                         seed=rng.getrandbits(32)).choose(board),
+}
+
+
+def count_nodes():
+    """
+    Wraps `ttt.result` in this process so every engine's search is measured
+    the same way: one node per board it generates.
+    """
+    original = ttt.result
+
+    def counted(board, action):
+        global nodes
+        nodes += 1
+        return original(board, action)
+
+    ttt.result = counted
+
+
+def play_game(job):
+    """
+    Plays one game and returns its outcome and a record of every move.
+    """
+    global nodes
+    x_engine, o_engine, seed = job
+    rng = random.Random(seed)
+    engines = {ttt.X: x_engine, ttt.O: o_engine}
+
+    # Every game starts with a cold cache, so the numbers of the cached
+    # engine do not depend on which games a worker happened to play before
+    ttt.cache.clear()
+
+    board = ttt.initial_state()
+    moves = []
+    error = None
+    while not ttt.terminal(board):
+        name = engines[ttt.player(board)]
+        nodes = 0
+        start = time.perf_counter()
+        action = ENGINES[name](board, rng)
+        elapsed = time.perf_counter() - start
+        moves.append({"engine": name, "seconds": elapsed, "nodes": nodes})
+
+        if action not in ttt.actions(board):
+            error = f"{name} returned illegal move {action}"
+            break
+        board = ttt.result(board, action)
+
+    return {
+        "x": x_engine,
+        "o": o_engine,
+        "seed": seed,
+        "winner": ttt.winner(board),
+        "moves": moves,
+        "error": error,
+    }
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of values using the nearest-rank method.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(0, min(len(values) - 1, round(p / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def check(game):
+    """
+    Returns a description of what went wrong in a game, or None.
+    """
+    if game["error"] is not None:
+        return game["error"]
+    x_perfect = game["x"] in PERFECT
+    o_perfect = game["o"] in PERFECT
+    if x_perfect and o_perfect and game["winner"] is not None:
+        return f"perfect play did not draw, {game['winner']} won"
+    if x_perfect and game["winner"] == ttt.O:
+        return f"{game['x']} lost as X"
+    if o_perfect and game["winner"] == ttt.X:
+        return f"{game['o']} lost as O"
+    return None
+
+
+def report(games, seconds):
+    """
+    Summarises finished games into a JSON-serialisable dictionary.
+    """
+    engines = dict()
+    for game in games:
+        for move in game["moves"]:
+            stats = engines.setdefault(move["engine"], {"seconds": [], "nodes": 0})
+            stats["seconds"].append(move["seconds"])
+            stats["nodes"] += move["nodes"]
+
+    engine_report = dict()
+    for name, stats in sorted(engines.items()):
+        total = sum(stats["seconds"])
+        engine_report[name] = {
+            "moves": len(stats["seconds"]),
+            "nodes": stats["nodes"],
+            "nodes_per_second": stats["nodes"] / total if total else None,
+            "latency_ms": {
+                f"p{p}": percentile(stats["seconds"], p) * 1000
+                for p in (50, 90, 99, 100)
+            },
+        }
+
+    matchups = dict()
+    for game in games:
+        key = f"{game['x']} vs {game['o']}"
+        outcome = "draw" if game["winner"] is None else f"{game['winner']} wins"
+        results = matchups.setdefault(key, {"X wins": 0, "O wins": 0, "draw": 0})
+        results[outcome] += 1
+
+    failures = []
+    for game in games:
+        problem = check(game)
+        if problem is not None:
+            failures.append({"x": game["x"], "o": game["o"],
+                             "seed": game["seed"], "problem": problem})
+
+    return {
+        "games": len(games),
+        "seconds": seconds,
+        "engines": engine_report,
+        "matchups": matchups,
+        "failures": failures,
+        "ok": not failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tic-tac-toe engine arena")
+    parser.add_argument("--games", type=int, default=10,
+                        help="games per pairing of engines")
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help="comma separated engines to play")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes in the pool (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None,
+                        help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    names = args.engines.split(",")
+    for name in names:
+        if name not in ENGINES:
+            sys.exit(f"Unknown engine {name}, choose from {', '.join(ENGINES)}")
+
+    jobs = []
+    seed = args.seed
+    for x_engine, o_engine in itertools.product(names, repeat=2):
+        for _ in range(args.games):
+            jobs.append((x_engine, o_engine, seed))
+            seed += 1
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=count_nodes) as pool:
+        games = pool.map(play_game, jobs, chunksize=max(1, len(jobs) // 64))
+    summary = report(games, time.perf_counter() - start)
+
+    text = json.dumps(summary, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    if not summary["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
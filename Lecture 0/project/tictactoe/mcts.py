@@ -0,0 +1,194 @@
+"""
+Monte Carlo Tree Search player for tic-tac-toe.
+
+Uses the same player/actions/result/terminal/utility functions as minimax,
+but only samples the game tree, so it can stop at any time and return the
+best move found so far.
+"""
+
+import math
+import multiprocessing
+import random
+import time
+
+import tictactoe as ttt
+
+
+class Node():
+    """
+    A board in the search tree together with its UCT statistics.
+
+    `reward` is counted for the player who moved into this board, so a
+    parent simply picks the child with the best reward for itself.
+    """
+
+    def __init__(self, board, parent=None, action=None):
+        self.board = board
+        self.parent = parent
+        self.action = action
+        self.children = []
+        self.untried = list(ttt.actions(board)) if not ttt.terminal(board) else []
+        self.visits = 0
+        self.reward = 0.0
+
+    def uct(self, exploration):
+        if self.visits == 0:
+            return math.inf
+        return (self.reward / self.visits
+                + exploration * math.sqrt(math.log(self.parent.visits) / self.visits))
+
+    def best_child(self, exploration):
+        return max(self.children, key=lambda child: child.uct(exploration))
+
+
+class MCTS():
+    """
+    Anytime UCT player.
+
+    Each call to `choose` searches until `iterations` playouts have been run
+    or `seconds` have passed, whichever comes first. Playouts are collected
+    in batches of `batch` leaves; with `workers` the rollouts of a batch run
+    in a process pool. The tree is kept between calls, so the subtree of the
+    position actually reached is reused on the next move.
+    """
+
+    def __init__(self, iterations=1000, seconds=None, exploration=math.sqrt(2),
+                 heuristic=False, batch=1, workers=None, seed=None):
+        if iterations is None and seconds is None:
+            raise ValueError("need an iteration or time budget")
+        self.iterations = iterations
+        self.seconds = seconds
+        self.exploration = exploration
+        self.heuristic = heuristic
+        self.batch = batch
+        self.rng = random.Random(seed)
+        self.pool = multiprocessing.Pool(workers) if workers else None
+        self.root = None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+    def choose(self, board):
+        """
+        Returns the best action found for the current player on the board.
+        """
+        if ttt.terminal(board):
+            return None
+
+        self.root = self.reuse(board)
+
+        deadline = None if self.seconds is None else time.perf_counter() + self.seconds
+        done = 0
+        while self.iterations is None or done < self.iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            size = self.batch
+            if self.iterations is not None:
+                size = min(size, self.iterations - done)
+            self.run_batch(size)
+            done += size
+
+        # Most visited is more robust than best average reward
+        best = max(self.root.children, key=lambda child: child.visits, default=None)
+        if best is None:
+            return self.rng.choice(self.root.untried)
+        return best.action
+
+    def reuse(self, board):
+        """
+        Returns the node for board from the previous search, looking at the
+        previous root, its children and grandchildren, or a fresh root.
+        """
+        key = ttt.board_key(board)
+        frontier = [self.root] if self.root is not None else []
+        for _ in range(3):
+            for node in frontier:
+                if ttt.board_key(node.board) == key:
+                    node.parent = None
+                    return node
+            frontier = [child for node in frontier for child in node.children]
+        return Node(board)
+
+    def run_batch(self, size):
+        """
+        Selects `size` leaves, plays them out and backs the results up.
+
+        Visits are counted on the way down, so later selections in the same
+        batch see the pending playouts as losses and spread out (virtual loss).
+        """
+        leaves = []
+        for _ in range(size):
+            node = self.root
+            node.visits += 1
+            while not node.untried and node.children:
+                node = node.best_child(self.exploration)
+                node.visits += 1
+            if node.untried:
+                action = node.untried.pop(self.rng.randrange(len(node.untried)))
+                child = Node(ttt.result(node.board, action), node, action)
+                node.children.append(child)
+                node = child
+                node.visits += 1
+            leaves.append(node)
+
+        jobs = [(leaf.board, self.heuristic, self.rng.getrandbits(32)) for leaf in leaves]
+        if self.pool is not None and len(jobs) > 1:
+            outcomes = self.pool.starmap(rollout, jobs)
+        else:
+            outcomes = [rollout(*job) for job in jobs]
+
+        for leaf, outcome in zip(leaves, outcomes):
+            node = leaf
+            while node.parent is not None:
+                node.reward += reward(outcome, ttt.player(node.parent.board))
+                node = node.parent
+
+
+def reward(outcome, player):
+    """
+    Converts a utility into a reward between 0 and 1 for player.
+    """
+    if outcome == 0:
+        return 0.5
+    return 1.0 if (outcome == 1) == (player == ttt.X) else 0.0
+
+
+def rollout(board, heuristic=False, seed=None):
+    """
+    Plays random moves from board until the game ends and returns its utility.
+    The heuristic playout takes a winning move, or else blocks the opponent's,
+    whenever one exists.
+    """
+    rng = random.Random(seed)
+    while not ttt.terminal(board):
+        options = sorted(ttt.actions(board))
+        action = None
+        if heuristic:
+            action = winning_move(board, options)
+            if action is None:
+                action = blocking_move(board, options)
+        if action is None:
+            action = rng.choice(options)
+        board = ttt.result(board, action)
+    return ttt.utility(board)
+
+
+def winning_move(board, options):
+    current = ttt.player(board)
+    for action in options:
+        if ttt.winner(ttt.result(board, action)) == current:
+            return action
+    return None
+
+
+def blocking_move(board, options):
+    current = ttt.player(board)
+    opponent = ttt.O if current == ttt.X else ttt.X
+    for action in options:
+        swapped = [row[:] for row in board]
+        swapped[action[0]][action[1]] = opponent
+        if ttt.winner(swapped) == opponent:
+            return action
+    return None
@@ -3,12 +3,19 @@ Tic Tac Toe Player
 """
 
 import copy
+import cProfile
 import math
+import multiprocessing
+import time
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Boards with fewer empty squares than this are searched serially even when
+# parallel search is requested, starting the pool would cost more than it saves
+PARALLEL_MIN_EMPTY = 7
+
 def initial_state():
     """
     Returns starting state of the board.
@@ -104,12 +111,22 @@ def utility(board):
     else: 
         return 0
 
-def minimax(board):
+def minimax(board, parallel=False, workers=None, stats=None):
     """
     Returns the optimal action for the current player on the board.
+
+    With `parallel`, the root actions are searched in a pool of `workers`
+    processes (see minimax_parallel); the action returned is the same.
+    Passing a SearchStats runs an instrumented serial search instead.
     """
+    if stats is not None:
+        return traced_search(board, stats, prune=False, use_cache=False)
+
     if terminal(board):
         return None
+
+    if parallel and len(actions(board)) >= PARALLEL_MIN_EMPTY:
+        return minimax_parallel(board, workers)
     
     optimal = None
 
@@ -149,6 +166,299 @@ def optimizeX(board):
             
     return maxVal
 
+def minimax_pruned(board, stats=None):
+    """
+    Returns the same action as `minimax`, but skips branches that can not
+    change the result (alpha-beta pruning).
+    """
+    if stats is not None:
+        return traced_search(board, stats, prune=True, use_cache=False)
+
+    if terminal(board):
+        return None
+
+    optimal = None
+
+    if player(board) == X:
+        maxVal = -math.inf
+        for action in actions(board):
+            # Children that only tie the best so far are cut off, so the
+            # first best action wins exactly like in minimax.
+            value = alphabeta(result(board, action), maxVal, math.inf)
+            if value > maxVal:
+                maxVal = value
+                optimal = action
+    else:
+        minVal = math.inf
+        for action in actions(board):
+            value = alphabeta(result(board, action), -math.inf, minVal)
+            if value < minVal:
+                minVal = value
+                optimal = action
+    return optimal
+
+def alphabeta(board, alpha, beta):
+    """
+    Returns the minimax value of the board if it lies between alpha and beta,
+    otherwise a bound on the wrong side of the window.
+    """
+    if terminal(board):
+        return utility(board)
+
+    if player(board) == X:
+        maxVal = -math.inf
+        for action in actions(board):
+            maxVal = max(maxVal, alphabeta(result(board, action), alpha, beta))
+            alpha = max(alpha, maxVal)
+            if alpha >= beta:
+                break
+        return maxVal
+
+    minVal = math.inf
+    for action in actions(board):
+        minVal = min(minVal, alphabeta(result(board, action), alpha, beta))
+        beta = min(beta, minVal)
+        if alpha >= beta:
+            break
+    return minVal
+
+# Best root value found so far by any worker of minimax_parallel, seen from
+# the root player's side (bigger is better for them)
+shared_bound = None
+
+def init_worker(bound):
+    global shared_bound
+    shared_bound = bound
+
+def minimax_parallel(board, workers=None):
+    """
+    Returns the same action as `minimax`, searching each root action in its
+    own process. Workers publish the values they find through a shared bound
+    so the others can prune against it.
+    """
+    children = list(actions(board))
+    maximizing = player(board) == X
+    bound = multiprocessing.Value("d", -math.inf)
+
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(bound,)) as pool:
+        values = pool.starmap(root_value, [(result(board, action), maximizing)
+                                           for action in children])
+
+    # Values that can not beat the best are only bounds, but the best ones are
+    # exact, so the first child reaching it is the one minimax would pick
+    best = max(values) if maximizing else min(values)
+    return children[values.index(best)]
+
+def root_value(board, maximizing):
+    """
+    Returns the value of a root child if it can be the best root action,
+    otherwise a bound proving it can not. Ties with the shared bound are
+    still searched exactly so the serial tie-break can be reproduced.
+    """
+    if terminal(board):
+        value = utility(board)
+    elif maximizing:
+        # Root player is X, so O chooses here; read the bound before every
+        # reply so values found by other workers prune this one early.
+        value = math.inf
+        for action in actions(board):
+            alpha = shared_bound.value - 1
+            value = min(value, alphabeta(result(board, action), alpha, math.inf))
+            if value <= alpha:
+                break
+    else:
+        value = -math.inf
+        for action in actions(board):
+            beta = -shared_bound.value + 1
+            value = max(value, alphabeta(result(board, action), -math.inf, beta))
+            if value >= beta:
+                break
+
+    score = value if maximizing else -value
+    with shared_bound.get_lock():
+        if score > shared_bound.value:
+            shared_bound.value = score
+    return value
+
+# Values of boards already solved by minimax_cached, keyed by board_key
+cache = dict()
+
+def minimax_cached(board, stats=None):
+    """
+    Returns the same action as `minimax`, remembering the value of every
+    position it solves so transpositions and later moves are looked up.
+    """
+    if stats is not None:
+        return traced_search(board, stats, prune=False, use_cache=True)
+
+    if terminal(board):
+        return None
+
+    optimal = None
+
+    if player(board) == X:
+        maxVal = -math.inf
+        for action in actions(board):
+            value = cached_value(result(board, action))
+            if value > maxVal:
+                maxVal = value
+                optimal = action
+    else:
+        minVal = math.inf
+        for action in actions(board):
+            value = cached_value(result(board, action))
+            if value < minVal:
+                minVal = value
+                optimal = action
+    return optimal
+
+def cached_value(board):
+    key = board_key(board)
+    if key in cache:
+        return cache[key]
+
+    if terminal(board):
+        value = utility(board)
+    elif player(board) == X:
+        value = max(cached_value(result(board, action)) for action in actions(board))
+    else:
+        value = min(cached_value(result(board, action)) for action in actions(board))
+
+    cache[key] = value
+    return value
+
+def board_key(board):
+    """
+    Returns a hashable copy of the board.
+    """
+    return tuple(tuple(row) for row in board)
+
+class SearchStats():
+    """
+    Collects what a search did. Pass one as `stats` to minimax,
+    minimax_pruned or minimax_cached; without it the searches are not
+    instrumented at all.
+
+    If `profile` is a file name, the search also runs under cProfile and the
+    profile is written there (readable with the pstats module or snakeviz).
+    """
+
+    def __init__(self, profile=None):
+        self.profile = profile
+        self.nodes_per_depth = []
+        self.cutoffs = 0
+        self.cache_hits = 0
+        self.winner_seconds = 0.0
+        self.result_seconds = 0.0
+        self.total_seconds = 0.0
+        self.value = None
+        self.principal_variation = []
+
+    @property
+    def nodes(self):
+        return sum(self.nodes_per_depth)
+
+    def visit(self, depth):
+        while len(self.nodes_per_depth) <= depth:
+            self.nodes_per_depth.append(0)
+        self.nodes_per_depth[depth] += 1
+
+    def report(self):
+        """
+        Returns the statistics as a dictionary.
+        """
+        return {
+            "nodes": self.nodes,
+            "nodes_per_depth": self.nodes_per_depth,
+            "cutoffs": self.cutoffs,
+            "cache_hits": self.cache_hits,
+            "winner_seconds": self.winner_seconds,
+            "result_seconds": self.result_seconds,
+            "total_seconds": self.total_seconds,
+            "value": self.value,
+            "principal_variation": self.principal_variation,
+        }
+
+    def __str__(self):
+        return "\n".join(f"{key}: {value}" for key, value in self.report().items())
+
+def traced_search(board, stats, prune, use_cache):
+    """
+    Returns the same action as the matching uninstrumented search, recording
+    into stats as it goes.
+    """
+    profiler = cProfile.Profile() if stats.profile is not None else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+
+    value, line = traced_value(board, 0, -math.inf, math.inf, stats, prune, use_cache)
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(stats.profile)
+    stats.total_seconds += time.perf_counter() - start
+    stats.value = value
+    stats.principal_variation = line
+    return line[0] if line else None
+
+def traced_value(board, depth, alpha, beta, stats, prune, use_cache):
+    """
+    Returns the value of board and the line of play leading to it.
+
+    Like minimax_pruned, the root only prunes children that can not beat
+    the best so far, so ties keep the first action found.
+    """
+    stats.visit(depth)
+
+    if use_cache:
+        key = board_key(board)
+        # The root is always expanded, its line is the one being asked for
+        if depth > 0 and key in cache:
+            stats.cache_hits += 1
+            return cache[key], []
+
+    start = time.perf_counter()
+    theWinner = winner(board)
+    stats.winner_seconds += time.perf_counter() - start
+
+    if theWinner is not None or not actions(board):
+        value = 1 if theWinner == X else -1 if theWinner == O else 0
+        if use_cache:
+            cache[key] = value
+        return value, []
+
+    maximizing = player(board) == X
+    best = -math.inf if maximizing else math.inf
+    line = []
+    for action in actions(board):
+        start = time.perf_counter()
+        child = result(board, action)
+        stats.result_seconds += time.perf_counter() - start
+
+        if depth == 0 and prune:
+            window = (best, math.inf) if maximizing else (-math.inf, best)
+        else:
+            window = (alpha, beta)
+        value, rest = traced_value(child, depth + 1, *window, stats, prune, use_cache)
+
+        if (value > best) if maximizing else (value < best):
+            best = value
+            line = [action] + rest
+
+        if prune and depth > 0:
+            if maximizing:
+                alpha = max(alpha, best)
+            else:
+                beta = min(beta, best)
+            if alpha >= beta:
+                stats.cutoffs += 1
+                break
+
+    if use_cache:
+        cache[key] = best
+    return best, line
+
 def check_rows(board):
     for row in board:
         if row[0] == row[1] == row[2] and row[0] is not EMPTY:
@@ -167,6 +477,6 @@ def check_diag_tl_br(board):
     return None
 
 def check_diag_tr_bl(board):
-    if board[0][2] == board[1][1] == board[2][0] and board[0][0] is not EMPTY:
+    if board[0][2] == board[1][1] == board[2][0] and board[0][2] is not EMPTY:
         return board[0][2]
     return None
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Times the model checking engines on generated knights and knaves puzzles.
+
+Usage: python benchmark.py [--sizes 2,4,8,...] [--methods a,b,...] [--seed S]
+                           [--max-enumerate N] [--max-bitwise N]
+                           [--max-inference N] [--output FILE]
+
+For each size a puzzle is generated, solved by every method and checked
+against its known solution. Time and peak memory (from tracemalloc) are
+printed as a table, and optionally written as JSON.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from logic import *
+import puzzles
+
+
+def solve_with(method):
+    def solve(knowledge, symbols):
+        return [symbol for symbol in symbols
+                if model_check(knowledge, symbol, method=method)]
+    return solve
+
+
+def solve_with_knowledge_base(knowledge, symbols):
+    return KnowledgeBase(knowledge).entailed(symbols)
+
+
+METHODS = {
+    "enumerate": solve_with("enumerate"),
+    "parallel": solve_with("parallel"),
+    "bitwise": solve_with("bitwise"),
+    "sat": solve_with("sat"),
+    "inference": solve_with("inference"),
+    "kb": solve_with_knowledge_base,
+}
+
+# Methods that try every model one at a time
+ENUMERATING = {"enumerate", "parallel"}
+
+
+def run(method, knowledge, solution):
+    """Solves a puzzle and returns a result row for it."""
+    symbols = list(solution)
+    tracemalloc.start()
+    start = time.perf_counter()
+    entailed = METHODS[method](knowledge, symbols)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    expected = [symbol for symbol in symbols if solution[symbol]]
+    return {
+        "method": method,
+        "seconds": seconds,
+        "peak_bytes": peak,
+        "correct": entailed == expected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model checking")
+    parser.add_argument("--sizes", default="2,4,6,8,10,16,32,64",
+                        help="comma separated numbers of inhabitants")
+    parser.add_argument("--methods", default=",".join(METHODS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-enumerate", type=int, default=7,
+                        help="largest size to run enumerate and parallel on")
+    parser.add_argument("--max-bitwise", type=int, default=12,
+                        help="largest size to run bitwise on")
+    parser.add_argument("--max-inference", type=int, default=16,
+                        help="largest size to run inference on")
+    parser.add_argument("--output", default=None,
+                        help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    methods = args.methods.split(",")
+    for method in methods:
+        if method not in METHODS:
+            sys.exit(f"Unknown method {method}, choose from {', '.join(METHODS)}")
+
+    results = []
+    print(f"{'size':>6} {'symbols':>8} {'method':>10} {'seconds':>10} {'peak KiB':>10}  ok")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        knowledge, solution = puzzles.generate(size, seed=args.seed + size)
+        for method in methods:
+            if method in ENUMERATING and size > args.max_enumerate:
+                continue
+            if method == "bitwise" and size > args.max_bitwise:
+                continue
+            if method == "inference" and size > args.max_inference:
+                continue
+            row = run(method, knowledge, solution)
+            row["size"] = size
+            row["symbols"] = len(knowledge.symbols())
+            row["sentences"] = len(knowledge.conjuncts)
+            results.append(row)
+            print(f"{size:>6} {row['symbols']:>8} {method:>10} "
+                  f"{row['seconds']:>10.4f} {row['peak_bytes'] / 1024:>10.1f}  "
+                  f"{'yes' if row['correct'] else 'NO'}")
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if not all(row["correct"] for row in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,46 @@
+import heapq
 import itertools
+import math
+import multiprocessing
+import re
+import weakref
+
+import sat
 
 
 class Sentence():
+    """Base class of logical sentences.
+
+    Sentences are immutable and interned: building a sentence equal to one
+    that already exists returns the existing object. Equality is therefore
+    identity, and the hash and set of symbols are computed once, when the
+    node is built.
+    """
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Every live sentence, keyed by its class and children
+    _interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def _intern(cls, key, symbols, **fields):
+        """Returns the sentence with the given structure, building it if needed."""
+        key = (cls,) + key
+        sentence = Sentence._interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "_hash", hash(key))
+            object.__setattr__(sentence, "_symbols", symbols)
+            Sentence._interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self._hash
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +52,7 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return frozenset()
 
     @classmethod
     def validate(cls, sentence):
@@ -42,16 +81,27 @@ class Sentence():
             return f"({s})"
 
 
+def flatten(cls, sentences, attribute):
+    """Returns sentences with nested cls nodes spliced in and duplicates removed."""
+    flat = []
+    for sentence in sentences:
+        Sentence.validate(sentence)
+        if isinstance(sentence, cls):
+            flat.extend(getattr(sentence, attribute))
+        else:
+            flat.append(sentence)
+    return tuple(dict.fromkeys(flat))
+
+
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __new__(cls, name):
+        return cls._intern((name,), frozenset((name,)), name=name)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -66,19 +116,19 @@ class Symbol(Sentence):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        return self._symbols
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    __slots__ = ("operand",)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls._intern((operand,), operand.symbols(), operand=operand)
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -90,22 +140,20 @@ class Not(Sentence):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
-        return self.operand.symbols()
+        return self._symbols
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+    __slots__ = ("conjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def __new__(cls, *conjuncts):
+        conjuncts = flatten(And, conjuncts, "conjuncts")
+        symbols = frozenset().union(*[c.symbols() for c in conjuncts])
+        return cls._intern(conjuncts, symbols, conjuncts=conjuncts)
+
+    def __reduce__(self):
+        return (And, self.conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +162,34 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        raise TypeError("sentences are immutable, use And(sentence, conjunct)")
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
     def formula(self):
+        if not self.conjuncts:
+            return "⊤"
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return self._symbols
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    __slots__ = ("disjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def __new__(cls, *disjuncts):
+        disjuncts = flatten(Or, disjuncts, "disjuncts")
+        symbols = frozenset().union(*[d.symbols() for d in disjuncts])
+        return cls._intern(disjuncts, symbols, disjuncts=disjuncts)
+
+    def __reduce__(self):
+        return (Or, self.disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -152,29 +199,30 @@ class Or(Sentence):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
     def formula(self):
+        if not self.disjuncts:
+            return "⊥"
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return self._symbols
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls._intern((antecedent, consequent),
+                           antecedent.symbols() | consequent.symbols(),
+                           antecedent=antecedent, consequent=consequent)
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -189,23 +237,21 @@ class Implication(Sentence):
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return self._symbols
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return cls._intern((left, right), left.symbols() | right.symbols(),
+                           left=left, right=right)
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -217,16 +263,225 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+        return self._symbols
+
+
+# Operators, parentheses and the constants ⊤ (empty And) and ⊥ (empty Or),
+# anything between them is a symbol name
+TOKEN = re.compile(r"(<=>|=>|¬|∧|∨|⊤|⊥|\(|\))")
+
+
+def parse(text):
+    """Parses a formula in the syntax written by Sentence.formula().
+
+    Binds tightest to loosest: ¬, ∧, ∨, => (right associative), <=>.
+    Symbol names are whatever lies between operators and parentheses, with
+    surrounding whitespace removed, so they may contain spaces. ⊤ is read
+    as And() and ⊥ as Or(), which is how formula() writes them.
+    """
+    tokens = [token.strip() for token in TOKEN.split(text)]
+    tokens = [token for token in tokens if token]
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take(expected=None):
+        nonlocal position
+        token = peek()
+        if token is None or (expected is not None and token != expected):
+            raise ValueError(f"expected {expected or 'a formula'} at token "
+                             f"{position} of {text!r}")
+        position += 1
+        return token
+
+    def biconditional():
+        sentence = implication()
+        while peek() == "<=>":
+            take()
+            sentence = Biconditional(sentence, implication())
+        return sentence
+
+    def implication():
+        sentence = disjunction()
+        if peek() == "=>":
+            take()
+            return Implication(sentence, implication())
+        return sentence
+
+    def disjunction():
+        disjuncts = [conjunction()]
+        while peek() == "∨":
+            take()
+            disjuncts.append(conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction():
+        conjuncts = [negation()]
+        while peek() == "∧":
+            take()
+            conjuncts.append(negation())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def negation():
+        token = take()
+        if token == "¬":
+            return Not(negation())
+        if token == "(":
+            sentence = biconditional()
+            take(")")
+            return sentence
+        if token == "⊤":
+            return And()
+        if token == "⊥":
+            return Or()
+        if TOKEN.fullmatch(token):
+            raise ValueError(f"unexpected {token!r} at token {position - 1} of {text!r}")
+        return Symbol(token)
+
+    if not tokens:
+        return And()
+    sentence = biconditional()
+    if peek() is not None:
+        raise ValueError(f"unexpected {peek()!r} at token {position} of {text!r}")
+    return sentence
+
+
+# Node kinds in serialized sentences
+SERIAL_KINDS = [Symbol, Not, And, Or, Implication, Biconditional]
+SERIAL_MAGIC = b"SENT\x01"
+
+
+def serialize(sentence):
+    """Returns a compact binary encoding of sentence.
+
+    Every distinct subformula is written once, children before parents, and
+    refers to its children by index, so shared subterms cost nothing extra.
+    All numbers are variable-length integers (7 bits per byte). Layout:
+    magic, symbol names, then nodes as a kind byte followed by operands.
+    """
+    names = dict()
+    index = dict()
+    nodes = []
+
+    # Iterative post-order walk, deep sentences do not hit the recursion limit
+    stack = [(sentence, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if node in index:
+            continue
+        children = sentence_children(node)
+        if expanded or not children:
+            if isinstance(node, Symbol):
+                operands = [names.setdefault(node.name, len(names))]
+            else:
+                operands = [index[child] for child in children]
+                if isinstance(node, (And, Or)):
+                    operands.insert(0, len(children))
+            index[node] = len(nodes)
+            nodes.append((SERIAL_KINDS.index(type(node)), operands))
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+
+    out = bytearray(SERIAL_MAGIC)
+    write_varint(out, len(names))
+    for name in names:
+        encoded = name.encode("utf-8")
+        write_varint(out, len(encoded))
+        out += encoded
+    write_varint(out, len(nodes))
+    for kind, operands in nodes:
+        out.append(kind)
+        for operand in operands:
+            write_varint(out, operand)
+    return bytes(out)
+
+
+def deserialize(data):
+    """Rebuilds the sentence encoded by serialize."""
+    if not data.startswith(SERIAL_MAGIC):
+        raise ValueError("not a serialized sentence")
+    position = len(SERIAL_MAGIC)
+
+    def varint():
+        nonlocal position
+        value, shift = 0, 0
+        while True:
+            byte = data[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    names = []
+    for _ in range(varint()):
+        length = varint()
+        names.append(data[position:position + length].decode("utf-8"))
+        position += length
+
+    nodes = []
+    for _ in range(varint()):
+        kind = SERIAL_KINDS[data[position]]
+        position += 1
+        if kind is Symbol:
+            nodes.append(Symbol(names[varint()]))
+        elif kind is Not:
+            nodes.append(Not(nodes[varint()]))
+        elif kind is And or kind is Or:
+            nodes.append(kind(*[nodes[varint()] for _ in range(varint())]))
+        else:
+            nodes.append(kind(nodes[varint()], nodes[varint()]))
+    return nodes[-1]
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def sentence_children(sentence):
+    """Returns the immediate subformulas of sentence."""
+    if isinstance(sentence, Not):
+        return (sentence.operand,)
+    if isinstance(sentence, And):
+        return sentence.conjuncts
+    if isinstance(sentence, Or):
+        return sentence.disjuncts
+    if isinstance(sentence, Implication):
+        return (sentence.antecedent, sentence.consequent)
+    if isinstance(sentence, Biconditional):
+        return (sentence.left, sentence.right)
+    return ()
+
+
+def model_check(knowledge, query, method="enumerate", workers=None):
+    """Checks if knowledge base entails query.
+
+    method "enumerate" tries every model, "parallel" splits them between
+    `workers` processes (see parallel_check), "bitwise" tries them many at
+    a time (see bitwise_check), "sat" asks a SAT solver whether
+    knowledge ∧ ¬query has a model instead (see sat_check), "inference"
+    proves query by forward chaining or resolution (see inference_check).
+    """
+    if method == "sat":
+        return sat_check(knowledge, query)
+    if method == "inference":
+        return inference_check(knowledge, query)
+    if method == "bitwise":
+        return bitwise_check(knowledge, query)
+    if method == "parallel":
+        return parallel_check(knowledge, query, workers)
+    if method != "enumerate":
+        raise ValueError(f"unknown model checking method {method}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -257,7 +512,649 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+class CNF():
+    """Equisatisfiable CNF for sentences, built with Tseitin encoding.
+
+    Symbols and subformulas are numbered as integer variables (a literal is
+    `v` or `-v`). Each And, Or, Implication and Biconditional gets a fresh
+    variable defined to be equivalent to it, so clauses grow linearly with
+    the sentences, however deeply Biconditionals are nested. Structurally
+    equal subformulas are looked up by their __eq__/__hash__ and encoded
+    only once.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.symbols = dict()
+        self.definitions = dict()
+        self.clauses = []
+
+    def new_var(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def variable(self, name):
+        """Returns the variable of the symbol with the given name."""
+        if name not in self.symbols:
+            self.symbols[name] = self.new_var()
+        return self.symbols[name]
+
+    def add(self, sentence):
+        """Adds clauses that force sentence to be true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly when sentence is."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        if isinstance(sentence, (And, Or, Implication)):
+            if isinstance(sentence, And):
+                literals = [self.literal(conjunct)
+                            for conjunct in sentence.conjuncts]
+            elif isinstance(sentence, Or):
+                literals = [-self.literal(disjunct)
+                            for disjunct in sentence.disjuncts]
+            else:
+                literals = [self.literal(sentence.antecedent),
+                            -self.literal(sentence.consequent)]
+
+            # x <=> l1 ∧ ... ∧ ln, an Or being ¬(¬d1 ∧ ... ∧ ¬dn)
+            x = self.new_var()
+            for literal in literals:
+                self.clauses.append([-x, literal])
+            self.clauses.append([x] + [-literal for literal in literals])
+            literal = x if isinstance(sentence, And) else -x
+
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            x = self.new_var()
+            self.clauses.append([-x, -a, b])
+            self.clauses.append([-x, a, -b])
+            self.clauses.append([x, a, b])
+            self.clauses.append([x, -a, -b])
+            literal = x
+
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.definitions[sentence] = literal
+        return literal
+
+    def decode(self, model):
+        """Converts a {variable: value} model back to {symbol name: value}."""
+        return {name: model[var] for name, var in self.symbols.items()}
+
+    def dimacs(self):
+        """Returns the clauses in DIMACS format, for external SAT solvers.
+
+        The symbol table is written as comment lines `c <variable> <name>`.
+        """
+        lines = [f"c {var} {name}" for name, var in self.symbols.items()]
+        lines.append(f"p cnf {self.num_vars} {len(self.clauses)}")
+        for clause in self.clauses:
+            lines.append(" ".join(str(literal) for literal in clause) + " 0")
+        return "\n".join(lines) + "\n"
+
+
+def sat_check(knowledge, query):
+    """Checks if knowledge base entails query with a SAT solver.
+
+    Knowledge entails query exactly when knowledge ∧ ¬query is
+    unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+
+    solver = sat.Solver()
+    solver.ensure_vars(cnf.num_vars)
+    for clause in cnf.clauses:
+        solver.add_clause(clause)
+    return not solver.solve()
+
+
+class KnowledgeBase():
+    """Knowledge base compiled once into a SAT solver and kept there.
+
+    Sentences can be added at any time; only their new clauses are passed
+    to the solver, which keeps everything it has learned so far. Queries
+    can be asked under assumptions (sentences taken as true for that query
+    only) without changing the knowledge base.
+    """
+
+    def __init__(self, *sentences):
+        self.cnf = CNF()
+        self.solver = sat.Solver()
+        self.loaded = 0
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        self.cnf.add(sentence)
+        self.load()
+
+    def literal(self, sentence):
+        """Returns the solver literal of sentence, compiling it if needed."""
+        literal = self.cnf.literal(sentence)
+        self.load()
+        return literal
+
+    def load(self):
+        """Passes clauses the solver has not seen yet to it."""
+        self.solver.ensure_vars(self.cnf.num_vars)
+        for clause in self.cnf.clauses[self.loaded:]:
+            self.solver.add_clause(clause)
+        self.loaded = len(self.cnf.clauses)
+
+    def satisfiable(self, assumptions=()):
+        """Checks if the knowledge base and assumptions can all be true."""
+        return self.solver.solve([self.literal(a) for a in assumptions])
+
+    def entails(self, query, assumptions=()):
+        """Checks if the knowledge base and assumptions entail query."""
+        literals = [self.literal(a) for a in assumptions]
+        return not self.solver.solve(literals + [-self.literal(query)])
+
+    def entailed(self, queries, assumptions=()):
+        """Returns the queries entailed by the knowledge base and assumptions.
+
+        Every model the solver finds along the way rules out all queries
+        false in it, so most queries never need a solver call of their own.
+        """
+        queries = list(queries)
+        literals = [self.literal(query) for query in queries]
+        assumed = [self.literal(a) for a in assumptions]
+
+        # Nothing is consistent with a contradiction, so it entails everything
+        if not self.solver.solve(assumed):
+            return queries
+
+        candidates = [i for i in range(len(queries))
+                      if self.holds(literals[i])]
+        entailed = []
+        while candidates:
+            i = candidates.pop()
+            if self.solver.solve(assumed + [-literals[i]]):
+                candidates = [j for j in candidates if self.holds(literals[j])]
+            else:
+                entailed.append(i)
+        return [queries[i] for i in sorted(entailed)]
+
+    def holds(self, literal):
+        """Checks if literal is true in the solver's last model."""
+        return self.solver.model[abs(literal)] == (literal > 0)
+
+
+def count_models(knowledge, symbols=()):
+    """Returns the number of models in which knowledge is true.
+
+    Models range over the symbols of knowledge plus any extra symbol names
+    given. Counting works on the CNF of knowledge: groups of clauses that
+    share no variables are counted separately and multiplied, and the count
+    of every such component is cached, so models are never listed one by one.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    extra = set(symbols) - set(cnf.symbols)
+
+    # Tseitin variables are fixed by the symbols, so they add no models
+    clauses = [frozenset(clause) for clause in cnf.clauses]
+    variables = set(range(1, cnf.num_vars + 1))
+    return count_clauses(clauses, variables, dict()) * 2 ** len(extra)
+
+
+def count_clauses(clauses, variables, cache):
+    """Returns the number of assignments to variables satisfying clauses."""
+    clauses, forced = unit_propagate(clauses)
+    if clauses is None:
+        return 0
+
+    used = {abs(literal) for clause in clauses for literal in clause}
+    total = 2 ** len(variables - used - forced)
+    for component in connected_components(clauses):
+        key = frozenset(component)
+        if key not in cache:
+            # Branch on the variable appearing in the most clauses
+            occurrences = dict()
+            for clause in component:
+                for literal in clause:
+                    var = abs(literal)
+                    occurrences[var] = occurrences.get(var, 0) + 1
+            var = max(occurrences, key=occurrences.get)
+            rest = set(occurrences) - {var}
+            cache[key] = (count_clauses(assign(component, var), rest, cache)
+                          + count_clauses(assign(component, -var), rest, cache))
+        total *= cache[key]
+        if total == 0:
+            return 0
+    return total
+
+
+def assign(clauses, literal):
+    """Returns clauses simplified with literal set to true."""
+    return [clause - {-literal} for clause in clauses if literal not in clause]
+
+
+def unit_propagate(clauses):
+    """Assigns the literals of unit clauses until none are left.
+
+    Returns the simplified clauses and the set of variables assigned, or
+    (None, None) if some clause became false.
+    """
+    forced = set()
+    while True:
+        if any(not clause for clause in clauses):
+            return None, None
+        unit = next((clause for clause in clauses if len(clause) == 1), None)
+        if unit is None:
+            return clauses, forced
+        literal, = unit
+        forced.add(abs(literal))
+        clauses = assign(clauses, literal)
+
+
+def connected_components(clauses):
+    """Splits clauses into groups that share no variables."""
+    parent = dict()
+
+    def find(var):
+        while parent.setdefault(var, var) != var:
+            parent[var] = parent[parent[var]]
+            var = parent[var]
+        return var
+
+    for clause in clauses:
+        first = find(abs(next(iter(clause))))
+        for literal in clause:
+            parent[find(abs(literal))] = first
+
+    components = dict()
+    for clause in clauses:
+        components.setdefault(find(abs(next(iter(clause)))), []).append(clause)
+    return list(components.values())
+
+
+def iter_models(knowledge, symbols=()):
+    """Yields every model in which knowledge is true, as {name: value}.
+
+    Models range over the symbols of knowledge plus any extra symbol names
+    given. They are produced lazily: the SAT solver finds one model, which
+    is then ruled out with a blocking clause before looking for the next.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    extra = sorted(set(symbols) - set(cnf.symbols))
+
+    solver = sat.Solver()
+    solver.ensure_vars(cnf.num_vars)
+    for clause in cnf.clauses:
+        solver.add_clause(clause)
+
+    while solver.solve():
+        model = cnf.decode(solver.model)
+        for values in itertools.product([False, True], repeat=len(extra)):
+            full = dict(model)
+            full.update(zip(extra, values))
+            yield full
+
+        # Rule out this assignment of the symbols (the rest follows from it)
+        solver.add_clause([-var if model[name] else var
+                           for name, var in cnf.symbols.items()])
+        if not cnf.symbols:
+            break
+
+
+# How many models a worker of parallel_check checks between looking at
+# whether another worker has already found a counter-model
+STOP_CHECK_INTERVAL = 1024
+
+# Set in each worker of parallel_check by init_cube_worker
+cube_knowledge = None
+cube_query = None
+cube_symbols = None
+cube_stop = None
+
+
+def parallel_check(knowledge, query, workers=None, split=None):
+    """Checks if knowledge base entails query, enumerating in a process pool.
+
+    The first `split` symbols are fixed in every combination, cutting the
+    models into 2 ** split cubes that are checked by different workers
+    (by default about four cubes per worker). The sentences are sent once
+    to each worker, and all of them stop as soon as one finds a model where
+    knowledge holds but query does not.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    workers = workers or multiprocessing.cpu_count()
+    if split is None:
+        split = math.ceil(math.log2(4 * workers))
+    split = min(split, len(symbols))
+
+    stop = multiprocessing.Event()
+    cubes = itertools.product([True, False], repeat=split)
+    with multiprocessing.Pool(workers, initializer=init_cube_worker,
+                              initargs=(knowledge, query, symbols, stop)) as pool:
+        for entailed in pool.imap_unordered(check_cube, cubes):
+            if not entailed:
+                # Leaving the block terminates the remaining workers
+                stop.set()
+                return False
+    return True
+
+
+def init_cube_worker(knowledge, query, symbols, stop):
+    global cube_knowledge, cube_query, cube_symbols, cube_stop
+    cube_knowledge = knowledge
+    cube_query = query
+    cube_symbols = symbols
+    cube_stop = stop
+
+
+def check_cube(fixed):
+    """Checks entailment in every model starting with the given values.
+
+    Returns True if there is no counter-model in this cube, or if another
+    worker has already found one (the answer is then decided elsewhere).
+    """
+    model = dict(zip(cube_symbols, fixed))
+    rest = cube_symbols[len(fixed):]
+    for count, values in enumerate(itertools.product([True, False], repeat=len(rest))):
+        if count % STOP_CHECK_INTERVAL == 0 and cube_stop.is_set():
+            return True
+        model.update(zip(rest, values))
+        if cube_knowledge.evaluate(model) and not cube_query.evaluate(model):
+            cube_stop.set()
+            return False
+    return True
+
+
+def clausify(sentence):
+    """Returns the clauses of sentence in conjunctive normal form.
+
+    Unlike CNF, no new variables are introduced, so the clauses are
+    equivalent to the sentence (and can be exponentially many). A clause
+    is a frozenset of literals, a literal being (symbol name, polarity).
+    """
+    def clauses(sentence, positive):
+        if isinstance(sentence, Symbol):
+            return {frozenset({(sentence.name, positive)})}
+        if isinstance(sentence, Not):
+            return clauses(sentence.operand, not positive)
+        if isinstance(sentence, Implication):
+            return clauses(Or(Not(sentence.antecedent), sentence.consequent),
+                           positive)
+        if isinstance(sentence, Biconditional):
+            left, right = sentence.left, sentence.right
+            return clauses(And(Implication(left, right),
+                               Implication(right, left)), positive)
+        if isinstance(sentence, (And, Or)):
+            children = (sentence.conjuncts if isinstance(sentence, And)
+                        else sentence.disjuncts)
+            # By De Morgan, a negated And behaves like an Or and vice versa
+            if isinstance(sentence, And) == positive:
+                return set().union(*[clauses(child, positive)
+                                     for child in children])
+            result = {frozenset()}
+            for child in children:
+                result = {a | b for a in result for b in clauses(child, positive)}
+            return result
+        raise TypeError("must be a logical sentence")
+
+    # Drop tautologies, they say nothing
+    return {clause for clause in clauses(sentence, True)
+            if not any((name, not positive) in clause for name, positive in clause)}
+
+
+def is_horn(clauses):
+    """Checks if every clause has at most one positive literal."""
+    return all(sum(positive for _, positive in clause) <= 1 for clause in clauses)
+
+
+def forward_chain(clauses, query):
+    """Checks if Horn clauses entail the symbol named query.
+
+    Each clause "p1 ∧ ... ∧ pn => q" keeps a count of premises not yet
+    known; a symbol is inferred when some count reaches zero, so every
+    clause is looked at at most once per premise. A clause with no
+    positive literal, "¬(p1 ∧ ... ∧ pn)", concludes ⊥ (written None):
+    deriving it means the clauses are inconsistent, and so entail anything.
+    """
+    count = dict()
+    conclusion = dict()
+    premise_of = dict()
+    agenda = []
+    for clause in clauses:
+        premises = [name for name, positive in clause if not positive]
+        head = next((name for name, positive in clause if positive), None)
+        if not premises:
+            agenda.append(head)
+            continue
+        count[clause] = len(premises)
+        conclusion[clause] = head
+        for premise in premises:
+            premise_of.setdefault(premise, []).append(clause)
+
+    inferred = set()
+    while agenda:
+        p = agenda.pop()
+        if p == query or p is None:
+            return True
+        if p in inferred:
+            continue
+        inferred.add(p)
+        for clause in premise_of.get(p, []):
+            count[clause] -= 1
+            if count[clause] == 0:
+                agenda.append(conclusion[clause])
+    return False
+
+
+def resolution_check(knowledge, query):
+    """Checks if knowledge base entails query by resolution refutation.
+
+    Uses the set-of-support strategy: the clauses of ¬query, and clauses
+    derived from them, are resolved smallest first (taken from a heap)
+    against everything kept so far, but two clauses of the knowledge base
+    are never resolved together, so facts unrelated to query are left
+    alone. New clauses that a kept clause subsumes (is a subset of) are
+    dropped, and kept clauses a new one subsumes are removed; clauses are
+    indexed by literal so neither check looks at every clause. Entailment
+    is proved by deriving the empty clause. Running out of new clauses
+    disproves it, unless the knowledge base is itself inconsistent (which
+    set of support cannot tell), checked then with KnowledgeBase.
+    """
+    active = dict()
+    passive = []
+    waiting = set()
+    counter = itertools.count()
+
+    # Every kept clause under each of its literals, and under its smallest
+    # literal only, for looking up supersets and subsets of a clause
+    containing = dict()
+    watched = dict()
+
+    def subsumed(clause):
+        return any(other <= clause for literal in clause
+                   for other in watched.get(literal, ()))
+
+    def discard(clause):
+        for literal in clause:
+            containing[literal].discard(clause)
+        watched[min(clause)].discard(clause)
+        active.pop(clause, None)
+        waiting.discard(clause)
+
+    def keep(clause):
+        rarest = min(clause, key=lambda literal: len(containing.get(literal, ())))
+        for other in [other for other in containing.get(rarest, ()) if clause <= other]:
+            discard(other)
+        for literal in clause:
+            containing.setdefault(literal, set()).add(clause)
+        watched.setdefault(min(clause), set()).add(clause)
+
+    for clause in sorted(clausify(knowledge), key=len):
+        if not clause:
+            return True
+        if not subsumed(clause):
+            keep(clause)
+            active[clause] = None
+    for clause in sorted(clausify(Not(query)), key=len):
+        if not clause:
+            return True
+        if not subsumed(clause):
+            keep(clause)
+            waiting.add(clause)
+            heapq.heappush(passive, (len(clause), next(counter), clause))
+
+    while passive:
+        _, _, given = heapq.heappop(passive)
+        if given not in waiting:
+            continue
+        waiting.discard(given)
+        active[given] = None
+
+        for other in list(active):
+            for name, positive in given:
+                if (name, not positive) not in other:
+                    continue
+                resolvent = (given - {(name, positive)}) | (other - {(name, not positive)})
+                if any((n, not p) in resolvent for n, p in resolvent):
+                    continue
+                if not resolvent:
+                    return True
+                if not subsumed(resolvent):
+                    keep(resolvent)
+                    waiting.add(resolvent)
+                    heapq.heappush(passive, (len(resolvent), next(counter), resolvent))
+    return not KnowledgeBase(knowledge).satisfiable()
+
+
+def inference_check(knowledge, query):
+    """Checks if knowledge base entails query by logical inference.
+
+    Knowledge bases made only of facts, implications from a conjunction of
+    symbols to a symbol and negated conjunctions of symbols (Horn clauses)
+    are answered by forward chaining in linear time, anything else by
+    resolution.
+    """
+    if isinstance(query, Symbol):
+        clauses = clausify(knowledge)
+        if is_horn(clauses):
+            return forward_chain(clauses, query.name)
+    return resolution_check(knowledge, query)
+
+
+# Number of symbols evaluated in parallel by bitwise_check, each value is
+# then an integer of 2 ** BITWISE_SYMBOLS bits
+BITWISE_SYMBOLS = 16
+
+
+def compile_sentence(sentence, symbols):
+    """Compiles sentence into a function that evaluates it on many models.
+
+    The function takes `mask`, an integer with one bit set per model, then
+    one integer per symbol (in the order of `symbols`) whose bits are that
+    symbol's value in each model. It returns an integer whose bits are the
+    sentence's value in each model, so a single Python int operation
+    evaluates a connective for thousands of models at once.
+    """
+    arguments = {name: f"v{i}" for i, name in enumerate(symbols)}
+    lines = []
+    names = dict()
+
+    def emit(sentence):
+        """Returns the name holding the value of sentence."""
+        if isinstance(sentence, Symbol):
+            return arguments[sentence.name]
+        if sentence in names:
+            return names[sentence]
+
+        if isinstance(sentence, Not):
+            expression = f"mask ^ {emit(sentence.operand)}"
+        elif isinstance(sentence, And):
+            operands = [emit(conjunct) for conjunct in sentence.conjuncts]
+            expression = " & ".join(operands) or "mask"
+        elif isinstance(sentence, Or):
+            operands = [emit(disjunct) for disjunct in sentence.disjuncts]
+            expression = " | ".join(operands) or "0"
+        elif isinstance(sentence, Implication):
+            antecedent = emit(sentence.antecedent)
+            expression = f"(mask ^ {antecedent}) | {emit(sentence.consequent)}"
+        elif isinstance(sentence, Biconditional):
+            left = emit(sentence.left)
+            expression = f"mask ^ ({left} ^ {emit(sentence.right)})"
+        else:
+            raise TypeError("must be a logical sentence")
+
+        name = f"t{len(lines)}"
+        lines.append(f"    {name} = {expression}")
+        names[sentence] = name
+        return name
+
+    output = emit(sentence)
+    parameters = ", ".join(["mask"] + list(arguments.values()))
+    source = "\n".join([f"def evaluate({parameters}):"] + lines
+                       + [f"    return {output}"])
+    namespace = dict()
+    exec(source, namespace)
+    evaluate = namespace["evaluate"]
+    evaluate.source = source
+    return evaluate
+
+
+def symbol_pattern(index, count):
+    """Returns the bits of symbol `index` over all 2 ** count models.
+
+    Model m gives the symbol the value of bit `index` of m.
+    """
+    width = 1 << index
+    block = ((1 << width) - 1) << width
+    repeat = ((1 << (1 << count)) - 1) // ((1 << (2 * width)) - 1)
+    return block * repeat
+
+
+def bitwise_check(knowledge, query):
+    """Checks if knowledge base entails query, many models at a time.
+
+    The first BITWISE_SYMBOLS symbols are evaluated in parallel across all
+    their combinations by a compiled evaluator, and the remaining ones are
+    enumerated as usual.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    evaluate = compile_sentence(And(knowledge, Not(query)), symbols)
+
+    parallel = symbols[:BITWISE_SYMBOLS]
+    rest = len(symbols) - len(parallel)
+    mask = (1 << (1 << len(parallel))) - 1
+    patterns = [symbol_pattern(i, len(parallel)) for i in range(len(parallel))]
+
+    for model in range(1 << rest):
+        values = [mask if model >> i & 1 else 0 for i in range(rest)]
+
+        # Any model where knowledge holds but query does not disproves it
+        if evaluate(mask, *patterns, *values):
+            return False
+    return True
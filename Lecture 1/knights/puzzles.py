@@ -0,0 +1,80 @@
+"""
+Random knights and knaves puzzles with a known, unique solution.
+"""
+
+import random
+
+from logic import *
+
+
+def knight(i):
+    return Symbol(f"{name(i)} is a Knight")
+
+
+def knave(i):
+    return Symbol(f"{name(i)} is a Knave")
+
+
+def name(i):
+    """Returns A, B, ..., Z, then A1, B1, ... for inhabitant i."""
+    letter = chr(ord("A") + i % 26)
+    return letter if i < 26 else f"{letter}{i // 26}"
+
+
+def statement(rng, speaker, n):
+    """Returns a random statement that inhabitant `speaker` could make."""
+    others = [i for i in range(n) if i != speaker] or [speaker]
+    kind = rng.randrange(5)
+    a = rng.choice(others)
+    b = rng.choice([speaker] + others)
+    if kind == 0:
+        # "A is a knight."
+        return knight(a)
+    if kind == 1:
+        # "A is a knave."
+        return knave(a)
+    if kind == 2:
+        # "A and B are the same kind."
+        return Or(And(knight(a), knight(b)), And(knave(a), knave(b)))
+    if kind == 3:
+        # "A and B are of different kinds."
+        return Or(And(knight(a), knave(b)), And(knave(a), knight(b)))
+    # "At least one of A and B is a knave."
+    return Or(knave(a), knave(b))
+
+
+def generate(n, seed=None):
+    """Generates a puzzle with n inhabitants and exactly one solution.
+
+    Returns the knowledge base, in the same form as the hand-written puzzles,
+    and the solution as a dictionary from each knight symbol to whether that
+    inhabitant is a knight.
+    """
+    rng = random.Random(seed)
+    solution = {knight(i): rng.random() < 0.5 for i in range(n)}
+    truth = dict()
+    for i in range(n):
+        truth[knight(i).name] = solution[knight(i)]
+        truth[knave(i).name] = not solution[knight(i)]
+
+    sentences = []
+    for i in range(n):
+        # All persons can either be a knight or a knave, not both.
+        sentences.append(And(Or(knight(i), knave(i)), Not(And(knight(i), knave(i)))))
+    kb = KnowledgeBase(*sentences)
+
+    # Only the true solution makes all of these literals hold
+    answer = And(*[knight(i) if solution[knight(i)] else knave(i) for i in range(n)])
+
+    while not kb.entails(answer):
+        speaker = rng.randrange(n)
+        said = statement(rng, speaker, n)
+
+        # Knights only say true things and knaves only false ones
+        if said.evaluate(truth) != solution[knight(speaker)]:
+            continue
+        sentence = Biconditional(knight(speaker), said)
+        sentences.append(sentence)
+        kb.add(sentence)
+
+    return And(*sentences), solution
@@ -0,0 +1,298 @@
+"""
+CDCL SAT solver over clauses of integer literals.
+
+A variable is a positive integer, its literals are `v` (true) and `-v`
+(false), and a clause is a list of literals of which at least one must hold.
+"""
+
+import heapq
+
+
+class Solver():
+    """
+    Conflict-driven clause-learning solver with two watched literals per
+    clause, first-UIP learning, VSIDS-style branching and restarts.
+
+    Clauses can be added between calls to `solve`, and each call can be
+    given assumptions: literals treated as true for that call only. Learned
+    clauses never depend on assumptions, so they are kept across calls.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+        self.learnts = []
+        # Clauses watching a literal, visited when that literal becomes false
+        self.watches = dict()
+
+        # Per variable, index 0 is unused
+        self.assigns = [None]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.heap = []
+        self.var_inc = 1.0
+
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+
+    def new_var(self):
+        """
+        Returns a fresh variable.
+        """
+        self.num_vars += 1
+        self.assigns.append(None)
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        heapq.heappush(self.heap, (0.0, self.num_vars))
+        return self.num_vars
+
+    def ensure_vars(self, n):
+        while self.num_vars < n:
+            self.new_var()
+
+    def value(self, lit):
+        """
+        Returns True or False if lit is assigned, None otherwise.
+        """
+        value = self.assigns[abs(lit)]
+        if value is None:
+            return None
+        return value if lit > 0 else not value
+
+    def add_clause(self, literals):
+        """
+        Adds a clause. Returns False if the clauses are now known to be
+        unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+
+        clause = []
+        for lit in literals:
+            self.ensure_vars(abs(lit))
+            value = self.value(lit)
+            if value is True or -lit in clause:
+                # Already satisfied, or a tautology
+                return True
+            if value is None and lit not in clause:
+                clause.append(lit)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.clauses.append(clause)
+            self.attach(clause)
+        return self.ok
+
+    def attach(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def decision_level(self):
+        return len(self.trail_lim)
+
+    def enqueue(self, lit, reason):
+        var = abs(lit)
+        self.assigns[var] = lit > 0
+        self.level[var] = self.decision_level()
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def cancel_until(self, level):
+        """
+        Undoes every assignment made above the given decision level.
+        """
+        if self.decision_level() <= level:
+            return
+        for lit in reversed(self.trail[self.trail_lim[level]:]):
+            var = abs(lit)
+            self.phase[var] = lit > 0
+            self.assigns[var] = None
+            self.reason[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by unit clauses. Returns a clause that
+        became false, or None if there was no conflict.
+        """
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+
+            watchers = self.watches.get(false_lit, [])
+            kept = []
+            self.watches[false_lit] = kept
+            i = 0
+            while i < len(watchers):
+                clause = watchers[i]
+                i += 1
+
+                # Keep the false literal in position 1
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if self.value(first) is True:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.value(first) is False:
+                        kept.extend(watchers[i:])
+                        self.qhead = len(self.trail)
+                        return clause
+                    self.enqueue(first, clause)
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from a conflict and the level
+        to backtrack to. The asserting literal comes first in the clause.
+        """
+        seen = set()
+        learnt = [None]
+        counter = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = conflict
+
+        while True:
+            for q in clause:
+                var = abs(q)
+                if lit is not None and var == abs(lit):
+                    continue
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.level[var] == self.decision_level():
+                        counter += 1
+                    else:
+                        learnt.append(q)
+
+            # Walk back to the next literal of this level involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            clause = self.reason[abs(lit)]
+            counter -= 1
+            if counter == 0:
+                break
+
+        learnt[0] = -lit
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # Watch the literal of the highest remaining level second
+        highest = max(range(1, len(learnt)), key=lambda k: self.level[abs(learnt[k])])
+        learnt[1], learnt[highest] = learnt[highest], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def bump(self, var):
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            for v in range(1, self.num_vars + 1):
+                self.activity[v] *= 1e-100
+            self.var_inc *= 1e-100
+            self.heap = [(-self.activity[v], v) for v in range(1, self.num_vars + 1)
+                         if self.assigns[v] is None]
+            heapq.heapify(self.heap)
+        if self.assigns[var] is None:
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+    def pick_branch(self):
+        """
+        Returns the unassigned variable with the highest activity, or None.
+        """
+        while self.heap:
+            _, var = heapq.heappop(self.heap)
+            if self.assigns[var] is None:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every assumption
+        true, False otherwise. After True, `model` maps each variable to
+        its value.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+        for lit in assumptions:
+            self.ensure_vars(abs(lit))
+
+        restart_limit = 100
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if self.decision_level() == 0:
+                    self.ok = False
+                    return False
+                learnt, level = self.analyze(conflict)
+                self.cancel_until(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.learnts.append(learnt)
+                    self.attach(learnt)
+                    self.enqueue(learnt[0], learnt)
+                self.var_inc /= 0.95
+                continue
+
+            if conflicts >= restart_limit:
+                conflicts = 0
+                restart_limit = int(restart_limit * 1.5)
+                self.cancel_until(0)
+                continue
+
+            if self.decision_level() < len(assumptions):
+                # Each assumption gets its own decision level
+                lit = assumptions[self.decision_level()]
+                value = self.value(lit)
+                if value is False:
+                    self.cancel_until(0)
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value is None:
+                    self.enqueue(lit, None)
+                continue
+
+            var = self.pick_branch()
+            if var is None:
+                self.model = {v: self.assigns[v] for v in range(1, self.num_vars + 1)}
+                self.cancel_until(0)
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(var if self.phase[var] else -var, None)
@@ -1,7 +1,13 @@
-import copy
+import collections
 import itertools
+import math
+import numpy
 import random
 
+# Search steps allowed when enumerating the mine layouts of one group of
+# cells, past that the group's probabilities are estimated instead
+MAX_LAYOUT_STEPS = 20000
+
 # 19/25 solution, could not do better in an evening. Might come back to this.
 class Minesweeper():
     """
@@ -13,23 +19,21 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
-
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Place mines on distinct cells, drawn in one go
+        positions = random.sample(range(height * width), mines)
+        self.board = numpy.zeros((height, width), dtype=bool)
+        self.board.flat[positions] = True
+        self.mines = set(divmod(position, width) for position in positions)
+
+        # Count the mines around every cell once: convolving the board with
+        # a 3x3 kernel of ones (minus the centre) is the sum of its 8 shifts
+        padded = numpy.pad(self.board, 1).astype(numpy.int8)
+        self.counts = numpy.zeros((height, width), dtype=numpy.int8)
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                if (di, dj) != (0, 0):
+                    self.counts += padded[1 + di:height + 1 + di, 1 + dj:width + 1 + dj]
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -51,7 +55,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i, j])
 
     def nearby_mines(self, cell):
         """
@@ -60,23 +64,33 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
+        i, j = cell
+        return int(self.counts[i, j])
 
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+    def reveal(self, cell):
+        """
+        Returns the cells opened by clicking on a safe cell, as a list of
+        (cell, nearby mines) pairs, the clicked cell first.
 
-        return count
+        If no mines are near a cell, all of its neighbours are opened too,
+        so a click on a zero opens its whole region of zeros and the border
+        around it, found by breadth-first search.
+        """
+        opened = [(cell, self.nearby_mines(cell))]
+        seen = {cell}
+        queue = collections.deque([cell]) if opened[0][1] == 0 else collections.deque()
+        while queue:
+            i, j = queue.popleft()
+            for ni in range(max(i - 1, 0), min(i + 2, self.height)):
+                for nj in range(max(j - 1, 0), min(j + 2, self.width)):
+                    if (ni, nj) in seen:
+                        continue
+                    seen.add((ni, nj))
+                    count = int(self.counts[ni, nj])
+                    opened.append(((ni, nj), count))
+                    if count == 0:
+                        queue.append((ni, nj))
+        return opened
 
     def won(self):
         """
@@ -90,42 +104,252 @@ class Sentence():
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    Cell (i, j) has index i * width + j. The cells are stored as a bitmask
+    in which bit b stands for the cell with index offset + b, and offset is
+    the lowest index, so the mask only spans the few rows the sentence
+    touches however big the board is. Comparing and combining sentences
+    are then a shift and a few small integer operations. `width` must be
+    the width of the board.
     """
 
-    def __init__(self, cells, count):
-        self.cells = set(cells)
+    def __init__(self, cells, count, width=8):
+        self.width = width
+        indices = []
+        for cell in cells:
+            if not 0 <= cell[1] < width:
+                raise ValueError(f"cell {cell} outside a board {width} wide")
+            indices.append(cell[0] * width + cell[1])
+        self.offset = min(indices, default=0)
+        self.mask = 0
+        for index in indices:
+            self.mask |= 1 << (index - self.offset)
         self.count = count
 
+    @classmethod
+    def from_mask(cls, mask, count, width, offset=0):
+        sentence = cls((), count, width)
+        sentence.offset = offset
+        sentence.mask = mask
+        sentence.normalize()
+        return sentence
+
+    def normalize(self):
+        """
+        Moves the offset up to the lowest cell, keeping the mask small.
+        """
+        if self.mask:
+            low = (self.mask & -self.mask).bit_length() - 1
+            self.mask >>= low
+            self.offset += low
+        else:
+            self.offset = 0
+
+    @property
+    def key(self):
+        return (self.offset, self.mask, self.count)
+
+    @property
+    def cells(self):
+        return set(cells_of(self.mask, self.width, self.offset))
+
+    def __len__(self):
+        return self.mask.bit_count()
+
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        return self.key == other.key
 
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
-    def known_mines(self):
-        known_mines = set()
+    def issubset(self, other):
+        return contains(other.key, self.key)
 
-        if self.count == len(self.cells):
-            known_mines.update(copy.deepcopy(self.cells))
-        
-        return known_mines
+    def known_mines(self):
+        if self.count == len(self):
+            return self.cells
+        return set()
 
     def known_safes(self):
-        known_safes = set()
-
         if self.count == 0:
-            known_safes.update(copy.deepcopy(self.cells))
-        
-        return known_safes
+            return self.cells
+        return set()
 
     def mark_mine(self, cell):
-        if cell in self.cells:
+        bit = cell[0] * self.width + cell[1] - self.offset
+        if bit >= 0 and self.mask >> bit & 1:
             self.count -= 1
-            self.cells.discard(cell)
+            self.mask ^= 1 << bit
+            self.normalize()
 
     def mark_safe(self, cell):
-        if cell in self.cells:
-            self.cells.discard(cell)
+        bit = cell[0] * self.width + cell[1] - self.offset
+        if bit >= 0 and self.mask >> bit & 1:
+            self.mask ^= 1 << bit
+            self.normalize()
+
+
+def cells_of(mask, width, offset=0):
+    """
+    Yields the (i, j) cell of every bit set in mask.
+    """
+    for index in bits_of(mask, offset):
+        yield divmod(index, width)
+
+
+def bits_of(mask, offset=0):
+    """
+    Yields offset plus the index of every bit set in mask.
+    """
+    while mask:
+        low = mask & -mask
+        yield offset + low.bit_length() - 1
+        mask ^= low
+
+
+def contains(outer, inner):
+    """
+    Checks if every cell of the sentence keyed `inner` is in the one keyed
+    `outer`, where keys are (offset, mask, count).
+    """
+    if inner[0] < outer[0]:
+        return not inner[1]
+    return (inner[1] << (inner[0] - outer[0])) & ~outer[1] == 0
+
+
+def difference(outer, inner, width):
+    """
+    Returns the sentence about the cells of the sentence keyed `outer` that
+    are not in its subset keyed `inner`.
+    """
+    offset, mask, count = outer
+    return Sentence.from_mask(mask & ~(inner[1] << (inner[0] - offset)),
+                              count - inner[2], width, offset)
+
+
+class Knowledge():
+    """
+    Set of sentences known to be true, indexed by the cells they mention.
+
+    Sentences are keyed by their offset, cell mask and count, so adding a
+    sentence equal to one already known does nothing. Cells are indexed by
+    their index on the board, and the sentences mentioning a cell are
+    bucketed by their size, so a search for subsets or supersets of a
+    sentence skips sentences too big or too small to be one.
+    A stored sentence must not change; `remove_cell` takes sentences out so
+    they can be changed and re-added.
+    """
+
+    def __init__(self):
+        self.sentences = dict()
+        self.by_cell = dict()
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __iter__(self):
+        return iter(list(self.sentences.values()))
+
+    def get(self, key):
+        return self.sentences.get(key)
+
+    def add(self, sentence):
+        """
+        Adds a sentence, returning its key, or None if it was already known.
+        """
+        key = sentence.key
+        if key in self.sentences:
+            return None
+        self.sentences[key] = sentence
+        size = len(sentence)
+        for index in bits_of(sentence.mask, sentence.offset):
+            self.by_cell.setdefault(index, dict()).setdefault(size, set()).add(key)
+        return key
+
+    def remove(self, key):
+        sentence = self.sentences.pop(key)
+        size = key[1].bit_count()
+        for index in bits_of(key[1], key[0]):
+            buckets = self.by_cell[index]
+            buckets[size].discard(key)
+            if not buckets[size]:
+                del buckets[size]
+                if not buckets:
+                    del self.by_cell[index]
+        return sentence
+
+    def remove_cell(self, index):
+        """
+        Removes and returns every sentence mentioning the cell with this index.
+        """
+        keys = [key for bucket in self.by_cell.get(index, dict()).values() for key in bucket]
+        return [self.remove(key) for key in keys]
+
+    def subsets(self, key):
+        """
+        Returns the keys of smaller sentences whose cells are all in this
+        sentence's cells.
+        """
+        size = key[1].bit_count()
+        keys = set()
+        for index in bits_of(key[1], key[0]):
+            for other_size, bucket in self.by_cell.get(index, dict()).items():
+                if other_size < size:
+                    keys.update(other for other in bucket if contains(key, other))
+        return keys
+
+    def supersets(self, key):
+        """
+        Returns the keys of bigger sentences which mention every cell of
+        this sentence.
+        """
+        size = key[1].bit_count()
+
+        # A superset mentions every cell, so any one cell's sentences have
+        # them all; the lowest cell is the offset
+        keys = set()
+        for other_size, bucket in self.by_cell.get(key[0], dict()).items():
+            if other_size > size:
+                keys.update(other for other in bucket if contains(other, key))
+        return keys
+
+
+class CellPool():
+    """
+    Set of cell indices with constant time removal and random choice.
+
+    The members are kept at the front of an array; removing one swaps it
+    with the last member, `position` remembers where each index is.
+    """
+
+    def __init__(self, size):
+        self.cells = numpy.arange(size)
+        self.position = numpy.arange(size)
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, index):
+        return self.position[index] < self.size
+
+    def __iter__(self):
+        for index in self.cells[:self.size]:
+            yield int(index)
+
+    def remove(self, index):
+        position = self.position[index]
+        if position >= self.size:
+            return
+        self.size -= 1
+        last = self.cells[self.size]
+        self.cells[position] = last
+        self.position[last] = position
+        self.cells[self.size] = index
+        self.position[index] = self.size
+
+    def choice(self):
+        return int(self.cells[random.randrange(self.size)])
 
 
 class MinesweeperAI():
@@ -133,12 +357,15 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Number of mines on the board, if known; used to weigh guesses
+        self.total_mines = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -146,26 +373,67 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells not clicked yet, and cells not known to be safe or mines
+        # (by bit index), kept up to date so big boards are never rescanned
+        self.safe_moves = set()
+        self.undecided = CellPool(height * width)
+
+        # Sentences about the game known to be true
+        self.knowledge = Knowledge()
+
+        # Layout tables of the frontier groups at the last guess, by the
+        # keys of their sentences, reused while a group is unchanged
+        self.layouts = dict()
+
+        # Sentences added or changed since inference last ran, and cells
+        # found to be mines or safe that are not marked yet
+        self.pending = collections.deque()
+        self.resolved = collections.deque()
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        self.undecided.remove(cell[0] * self.width + cell[1])
+        for sentence in self.knowledge.remove_cell(cell[0] * self.width + cell[1]):
             sentence.mark_mine(cell)
+            self.add_sentence(sentence)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        self.undecided.remove(cell[0] * self.width + cell[1])
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for sentence in self.knowledge.remove_cell(cell[0] * self.width + cell[1]):
             sentence.mark_safe(cell)
+            self.add_sentence(sentence)
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, unless it says nothing new.
+
+        A sentence that fixes all of its cells is not stored, its cells are
+        queued to be marked as mines or safe instead.
+        """
+        if not sentence.mask:
+            return
+        if sentence.count == 0 or sentence.count == len(sentence):
+            mine = sentence.count > 0
+            self.resolved.extend((cell, mine) for cell in sentence.cells)
+            return
+        key = self.knowledge.add(sentence)
+        if key is not None:
+            self.pending.append(key)
 
     def add_knowledge(self, cell, count):
         """
@@ -182,56 +450,68 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
-        # 1)
-        self.moves_made.add(cell)
+        self.add_knowledge_batch([(cell, count)])
 
-        # 2)
-        self.mark_safe(cell)
+    def add_knowledge_batch(self, observations):
+        """
+        Same as add_knowledge for many (cell, count) pairs at once, such as
+        the cells opened by one click (see Minesweeper.reveal).
+
+        All the cells are marked safe before any sentence is made, so the
+        sentences only mention cells still unknown, and inference runs once
+        at the end rather than after every cell.
+        """
+        # 1) and 2)
+        for cell, _ in observations:
+            self.moves_made.add(cell)
+            self.safe_moves.discard(cell)
+            self.mark_safe(cell)
 
         # 3)
-        cells = set()
-        touching_cells = set()
-        current_count = copy.deepcopy(count)
-
-        # Iterate through all the cells touching the given cell, and add the ones that are not included in moves_made OR the cell itself to touching_cells
-        for i in range(0, 3):
-            for j in range (0, 3):
-                y = i + cell[0] - 1
-                x = j + cell[1] - 1
-                if x >= 0 and x < self.width and y >=0 and y < self.height and (y, x) != cell and (y, x) not in self.moves_made:
-                    touching_cells.add((y, x))
-        
-        for touching in touching_cells:
-            if touching in self.mines:
-                current_count -= 1
-            if touching not in self.mines | self.safes:
-                cells.add(touching)
-
-        sentence = Sentence(touching_cells, current_count)
-
-        self.knowledge.append(sentence)
-
-        # 4)
-        for s in self.knowledge:
-            mines = s.known_mines()
-            safes = s.known_safes()
-            if mines:
-                for mine in mines:
-                    self.mark_mine(mine)
-            
-            if safes:
-                for safe in safes:
-                    self.mark_safe(safe)
-        
-        # 5)
-        # travel through each sentence in the knowledge base and compare each one to eachother.  
-        for i, sentencei in enumerate(self.knowledge):
-            for j, sentencej in enumerate(self.knowledge):
-                # if one sentence is a subset of another AND they are not the same sentence, create and append a new sentence that contains only the cells NOT within the subset, and subtract the subset count. 
-                # This is following the logic from the final inference shown in the project's background.
-                if sentencei.cells in sentencej.cells and i != j:
-                    newSentence = Sentence(set(sentencej.cells - sentencei.cells), sentencej.count - sentencei.count)
-                    self.knowledge.append(newSentence)
+        # Only cells we know nothing about go in the sentence, every known mine
+        # among the neighbours is taken off the count instead
+        for cell, count in observations:
+            cells = set()
+            for i in range(cell[0] - 1, cell[0] + 2):
+                for j in range(cell[1] - 1, cell[1] + 2):
+                    if (i, j) == cell or not (0 <= i < self.height and 0 <= j < self.width):
+                        continue
+                    if (i, j) in self.mines:
+                        count -= 1
+                    elif (i, j) not in self.safes:
+                        cells.add((i, j))
+
+            self.add_sentence(Sentence(cells, count, self.width))
+
+        # 4) and 5)
+        self.infer()
+
+    def infer(self):
+        """
+        Draws conclusions until nothing new follows.
+
+        Only sentences that were added or changed are looked at, and each is
+        only compared with its subsets and supersets, found through the cell
+        index: the difference between a sentence and a subset of it makes a
+        new sentence, which is queued rather than compared straight away.
+        """
+        while self.resolved or self.pending:
+            if self.resolved:
+                cell, mine = self.resolved.popleft()
+                if mine:
+                    self.mark_mine(cell)
+                else:
+                    self.mark_safe(cell)
+                continue
+
+            key = self.pending.popleft()
+            sentence = self.knowledge.get(key)
+            if sentence is None:
+                continue
+            for other_key in self.knowledge.subsets(key):
+                self.add_sentence(difference(key, other_key, self.width))
+            for other_key in self.knowledge.supersets(key):
+                self.add_sentence(difference(other_key, key, self.width))
 
     def make_safe_move(self):
         """
@@ -242,11 +522,9 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        if self.safes:
-            for cell in self.safes:
-                if cell not in self.moves_made:
-                    return copy.deepcopy(cell)
-            
+        for cell in self.safe_moves:
+            return cell
+
         return None
 
     def make_random_move(self):
@@ -255,20 +533,286 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+
+        The cell least likely to be a mine is chosen (see
+        mine_probabilities), ties broken at random.
         """
 
         if not self.moves_made: 
             return (random.randint(0, self.height - 1), random.randint(0, self.width - 1))
 
-        board = set()
-        for i in range(0, self.height):
-            for j in range(0, self.width):
-                board.add((i, j))
-        
-        uncertain_cells = (board - self.moves_made) - self.mines
-
-        if uncertain_cells:
-            return uncertain_cells.pop()
-        
+        probabilities, other = self.frontier_probabilities()
+
+        # Cells that are certainly mines were not caught by the simpler
+        # inference, mark them so the game can be won once they are all found
+        certain = [cell for cell, p in probabilities.items() if p == 1]
+        if certain:
+            for cell in certain:
+                self.mark_mine(cell)
+            self.infer()
+            return self.make_safe_move() or self.make_random_move()
+
+        lowest = min(probabilities.values(), default=None)
+        if other is not None and (lowest is None or other <= lowest):
+            cell = self.random_other_cell(probabilities)
+            if lowest is None or other < lowest:
+                return cell
+            return random.choice([cell] + [c for c, p in probabilities.items() if p == lowest])
+
+        if lowest is None:
+            return None
+        return random.choice([cell for cell, p in probabilities.items() if p == lowest])
+
+    def random_other_cell(self, frontier):
+        """
+        Returns a random undecided cell outside the frontier.
+        """
+        # Most undecided cells are usually outside the frontier, so drawing
+        # until one is found beats listing them; list them if that fails
+        for _ in range(100):
+            cell = divmod(self.undecided.choice(), self.width)
+            if cell not in frontier:
+                return cell
+        return random.choice([divmod(index, self.width) for index in self.undecided
+                              if divmod(index, self.width) not in frontier])
+
+    def mine_probabilities(self):
+        """
+        Returns the probability that each undecided cell is a mine.
+        """
+        probabilities, other = self.frontier_probabilities()
+        for index in self.undecided:
+            cell = divmod(index, self.width)
+            if cell not in probabilities:
+                probabilities[cell] = other
+        return probabilities
+
+    def frontier_probabilities(self):
+        """
+        Returns the probability that each cell mentioned by some sentence
+        (the frontier), or known to be safe but not clicked, is a mine, and
+        the probability for every other undecided cell (None if there are
+        none).
+
+        The frontier is split into groups that share no sentence, and every
+        mine layout of each group consistent with its sentences is
+        enumerated (or estimated, for a group with too many). If the total
+        number of mines is known, each combination of layouts is weighed by
+        the number of ways to place the remaining mines in the other
+        undecided cells, which makes the probabilities exact. Otherwise every
+        layout counts the same and the other cells get the average frontier
+        probability.
+        """
+        tables = []
+        layouts = dict()
+        for cells, sentences in components(list(self.knowledge)):
+            key = frozenset(sentence.key for sentence in sentences)
+            table = self.layouts.get(key) or normalize(enumerate_layouts(cells, sentences))
+            layouts[key] = table
+            tables.append(table)
+        self.layouts = layouts
+        others = len(self.undecided) - sum(len(table[0]) for table in tables)
+        probabilities = {cell: 0.0 for cell in self.safe_moves}
+
+        if self.total_mines is None:
+            return unweighted_probabilities(tables, others, probabilities)
+
+        # weight[k] is proportional to the ways to place the mines not in the
+        # frontier in the other cells, if the frontier has k mines. Binomials
+        # of a big board have huge numbers of digits, so only their ratios
+        # are computed, from logarithms
+        remaining = self.total_mines - len(self.mines)
+        length = 1 + sum(len(ways) - 1 for _, ways, _ in tables)
+        logs = [log_comb(others, remaining - k) for k in range(length)]
+        if all(log is None for log in logs):
+            # Knowledge contradicts the mine count, fall back to layouts alone
+            return unweighted_probabilities(tables, others, probabilities)
+        top = max(log for log in logs if log is not None)
+        weight = numpy.array([0.0 if log is None else math.exp(log - top) for log in logs])
+
+        # after[g][k]: weight of k mines in groups before g, summed over the
+        # mine counts of group g and the groups after it
+        after = [None] * len(tables)
+        tail = weight
+        for index in reversed(range(len(tables))):
+            after[index] = tail
+            tail = numpy.correlate(tail, tables[index][1], "valid")
+        total = tail[0]
+        if total == 0:
+            return unweighted_probabilities(tables, others, probabilities)
+
+        # Walk forwards keeping the mine-count distribution of earlier groups
+        before = numpy.ones(1)
+        for index, (cells, ways, mine_ways) in enumerate(tables):
+            # Weight of everything outside this group, given its mine count
+            outside = numpy.correlate(after[index], before, "valid")
+
+            # The group's total and its cells' mine weights in one product,
+            # so a cell that is a mine in every layout gets exactly 1
+            weighed = numpy.vstack([ways, mine_ways]) @ outside
+            for cell, mine in zip(cells, weighed[1:]):
+                probabilities[cell] = min(1.0, mine / weighed[0])
+            before = numpy.convolve(before, ways)
+
+        other = None
+        if others:
+            expected = before @ (weight * (remaining - numpy.arange(length)))
+            other = expected / total / others
+        return probabilities, other
+
+
+def log_comb(n, k):
+    """
+    Returns the logarithm of n choose k, or None if it is 0.
+    """
+    if not 0 <= k <= n:
         return None
-                
\ No newline at end of file
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def normalize(table):
+    """
+    Returns a layout table (see enumerate_layouts) as arrays of
+    probabilities: ways divided by the number of layouts, and mine_ways
+    transposed so row i is cell i.
+    """
+    cells, ways, mine_ways = table
+    total = sum(ways)
+    return (cells, numpy.array(ways, dtype=float) / total,
+            numpy.ascontiguousarray(numpy.array(mine_ways, dtype=float).T) / total)
+
+
+def unweighted_probabilities(tables, others, probabilities):
+    """
+    Returns frontier probabilities counting every layout of every group the
+    same, for when the total number of mines is not known, and the average
+    frontier probability for the other cells.
+    """
+    frontier = []
+    for cells, ways, mine_ways in tables:
+        for cell, mine in zip(cells, mine_ways.sum(axis=1)):
+            probabilities[cell] = min(1.0, mine / ways.sum())
+            frontier.append(probabilities[cell])
+    other = None
+    if others:
+        other = sum(frontier) / len(frontier) if frontier else 0.5
+    return probabilities, other
+
+
+def components(sentences):
+    """
+    Splits sentences into groups that share no cells.
+    Returns a list of (cells, sentences) pairs.
+    """
+    parent = dict()
+
+    def find(cell):
+        while parent.setdefault(cell, cell) != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    decoded = [list(sentence.cells) for sentence in sentences]
+    for cells in decoded:
+        for cell in cells[1:]:
+            parent[find(cell)] = find(cells[0])
+
+    groups = dict()
+    for sentence, cells in zip(sentences, decoded):
+        group, members = groups.setdefault(find(cells[0]), (set(), []))
+        group.update(cells)
+        members.append(sentence)
+    return list(groups.values())
+
+
+def enumerate_layouts(cells, sentences):
+    """
+    Counts the mine layouts of cells that satisfy every sentence.
+
+    Returns (cells, ways, mine_ways): cells as a list, ways[k] the number of
+    layouts with k mines, and mine_ways[k][i] how many of those have a mine
+    in cells[i]. Cells are assigned in the order they were reached from one
+    another, so sentences are settled early and dead ends cut off quickly.
+
+    If the search needs more than MAX_LAYOUT_STEPS steps, it is abandoned
+    and the layouts are estimated by approximate_layouts instead.
+    """
+    # Breadth-first order through cells that share a sentence
+    decoded = [sentence.cells for sentence in sentences]
+    by_cell = dict()
+    for index, sentence_cells in enumerate(decoded):
+        for cell in sentence_cells:
+            by_cell.setdefault(cell, []).append(index)
+    start = min(cells)
+    order = [start]
+    seen = {start}
+    for cell in order:
+        for index in by_cell[cell]:
+            for other in sorted(decoded[index] - seen):
+                seen.add(other)
+                order.append(other)
+
+    counts = [sentence.count for sentence in sentences]
+    unassigned = [len(sentence) for sentence in sentences]
+    assigned_mines = [0] * len(sentences)
+    layout = [False] * len(order)
+    ways = []
+    mine_ways = []
+    steps = 0
+
+    def search(position, mines):
+        nonlocal steps
+        steps += 1
+        if steps > MAX_LAYOUT_STEPS:
+            return
+        if position == len(order):
+            while len(ways) <= mines:
+                ways.append(0)
+                mine_ways.append([0] * len(order))
+            ways[mines] += 1
+            for i, mine in enumerate(layout):
+                if mine:
+                    mine_ways[mines][i] += 1
+            return
+
+        touching = by_cell[order[position]]
+        for mine in (False, True):
+            for index in touching:
+                unassigned[index] -= 1
+                assigned_mines[index] += mine
+            if all(assigned_mines[index] <= counts[index]
+                   and assigned_mines[index] + unassigned[index] >= counts[index]
+                   for index in touching):
+                layout[position] = mine
+                search(position + 1, mines + mine)
+            for index in touching:
+                unassigned[index] += 1
+                assigned_mines[index] -= mine
+        layout[position] = False
+
+    search(0, 0)
+    if steps > MAX_LAYOUT_STEPS:
+        return approximate_layouts(order, sentences)
+    return order, ways, mine_ways
+
+
+def approximate_layouts(cells, sentences):
+    """
+    Estimates the layout table of enumerate_layouts for a group of cells
+    too big to enumerate.
+
+    Each cell is taken to be a mine independently, with the average mine
+    density of the sentences mentioning it. ways[k] is then the chance of
+    k mines in the group, and mine_ways[k][i] that chance times cell i's.
+    """
+    density = dict()
+    for sentence in sentences:
+        for cell in sentence.cells:
+            density.setdefault(cell, []).append(sentence.count / len(sentence))
+    chances = [sum(density[cell]) / len(density[cell]) for cell in cells]
+
+    ways = numpy.ones(1)
+    for p in chances:
+        ways = numpy.convolve(ways, [1 - p, p])
+    mine_ways = [[p * w for p in chances] for w in ways]
+    return list(cells), ways, mine_ways
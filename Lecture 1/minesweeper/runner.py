@@ -1,6 +1,7 @@
 import pygame
+import queue
 import sys
-import time
+import threading
 
 from minesweeper import Minesweeper, MinesweeperAI
 
@@ -8,21 +9,17 @@ HEIGHT = 8
 WIDTH = 8
 MINES = 8
 
+FPS = 60
+
+# Moves asked of the AI per frame in fast-forward mode
+FAST_FORWARD_MOVES = 50
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
 WHITE = (255, 255, 255)
 
-# Create game
-pygame.init()
 size = width, height = 600, 400
-screen = pygame.display.set_mode(size)
-
-# Fonts
-OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
-smallFont = pygame.font.Font(OPEN_SANS, 20)
-mediumFont = pygame.font.Font(OPEN_SANS, 28)
-largeFont = pygame.font.Font(OPEN_SANS, 40)
 
 # Compute board size
 BOARD_PADDING = 20
@@ -31,192 +28,338 @@ board_height = height - (BOARD_PADDING * 2)
 cell_size = int(min(board_width / WIDTH, board_height / HEIGHT))
 board_origin = (BOARD_PADDING, BOARD_PADDING)
 
-# Add images
-flag = pygame.image.load("assets/images/flag.png")
-flag = pygame.transform.scale(flag, (cell_size, cell_size))
-mine = pygame.image.load("assets/images/mine.png")
-mine = pygame.transform.scale(mine, (cell_size, cell_size))
-
-# Create game and AI agent
-game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
-
-# Keep track of revealed cells, flagged cells, and if a mine was hit
-revealed = set()
-flags = set()
-lost = False
-
-# Show instructions initially
-instructions = True
-
-while True:
-
-    # Check if game quit
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            sys.exit()
-
-    screen.fill(BLACK)
-
-    # Show game instructions
-    if instructions:
-
-        # Title
-        title = largeFont.render("Play Minesweeper", True, WHITE)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
-
-        # Rules
-        rules = [
-            "Click a cell to reveal it.",
-            "Right-click a cell to mark it as a mine.",
-            "Mark all mines successfully to win!"
-        ]
-        for i, rule in enumerate(rules):
-            line = smallFont.render(rule, True, WHITE)
-            lineRect = line.get_rect()
-            lineRect.center = ((width / 2), 150 + 30 * i)
-            screen.blit(line, lineRect)
-
-        # Play game button
-        buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
-        buttonText = mediumFont.render("Play Game", True, BLACK)
-        buttonTextRect = buttonText.get_rect()
-        buttonTextRect.center = buttonRect.center
-        pygame.draw.rect(screen, WHITE, buttonRect)
-        screen.blit(buttonText, buttonTextRect)
-
-        # Check if play button clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if buttonRect.collidepoint(mouse):
-                instructions = False
-                time.sleep(0.3)
-
-        pygame.display.flip()
-        continue
-
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size, cell_size
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.nearby_mines((i, j))),
-                    True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2, 50
+
+class AIWorker():
+    """
+    Plays the AI in a background thread so inference on big boards never
+    blocks the pygame loop.
+
+    The worker owns the AI: user clicks go through `click` too, so only one
+    thread ever touches its knowledge. Each request answers with a stream of
+    results on a queue, which the game loop drains with `poll` once per
+    frame, and a final ("done", None) once the request is finished.
+
+    Results are ("opened", [(cell, count), ...], message), ("lost", cell)
+    and ("finished", mines) when the AI has no move left.
+    """
+
+    def __init__(self, game, ai):
+        self.game = game
+        self.ai = ai
+        self.over = False
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.outstanding = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def play(self, moves):
+        """
+        Asks for up to `moves` AI moves.
+        """
+        self.outstanding += 1
+        self.requests.put(("play", moves))
+
+    def click(self, cell):
+        """
+        Asks for a cell chosen by the user to be opened.
+        """
+        self.outstanding += 1
+        self.requests.put(("click", cell))
+
+    def busy(self):
+        return self.outstanding > 0
+
+    def poll(self):
+        """
+        Returns every result made since the last call, without waiting.
+        """
+        results = []
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                return results
+            if result[0] == "done":
+                self.outstanding -= 1
+            else:
+                results.append(result)
+
+    def close(self):
+        """
+        Stops the worker after the move it is making, its results are
+        never read.
+        """
+        self.stopped.set()
+        self.requests.put(None)
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            kind, argument = request
+            if kind == "click":
+                self.open(argument, None)
+            else:
+                for _ in range(argument):
+                    if self.over or self.stopped.is_set() or not self.step():
+                        break
+            self.results.put(("done", None))
+
+    def step(self):
+        """
+        Makes one AI move. Returns False once the game is over.
+        """
+        move = self.ai.make_safe_move()
+        if move is not None:
+            return self.open(move, "AI making safe move.")
+        move = self.ai.make_random_move()
+        if move is None:
+            self.over = True
+            self.results.put(("finished", set(self.ai.mines)))
+            return False
+        return self.open(move, "No known safe moves, AI making random move.")
+
+    def open(self, cell, message):
+        if self.over or cell in self.ai.moves_made:
+            return not self.over
+        if self.game.is_mine(cell):
+            self.over = True
+            self.results.put(("lost", cell))
+            return False
+        opened = self.game.reveal(cell)
+        self.ai.add_knowledge_batch(opened)
+        self.results.put(("opened", opened, message))
+        return True
+
+
+def cell_rect(cell):
+    i, j = cell
+    return pygame.Rect(
+        board_origin[0] + j * cell_size,
+        board_origin[1] + i * cell_size,
+        cell_size, cell_size
     )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
+
+
+def cell_at(position):
+    """
+    Returns the cell under a point on the screen, or None.
+    """
+    x, y = position
+    i = (y - board_origin[1]) // cell_size
+    j = (x - board_origin[0]) // cell_size
+    if 0 <= i < HEIGHT and 0 <= j < WIDTH:
+        return (i, j)
+    return None
+
+
+def draw_button(screen, rect, label, font):
+    text = font.render(label, True, BLACK)
     textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
+    textRect.center = rect.center
+    pygame.draw.rect(screen, WHITE, rect)
     screen.blit(text, textRect)
 
-    move = None
-
-    left, _, right = pygame.mouse.get_pressed()
-
-    # Check for a right-click to toggle flagging
-    if right == 1 and not lost:
-        mouse = pygame.mouse.get_pos()
-        for i in range(HEIGHT):
-            for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
-                    if (i, j) in flags:
-                        flags.remove((i, j))
-                    else:
-                        flags.add((i, j))
-                    time.sleep(0.2)
-
-    elif left == 1:
-        mouse = pygame.mouse.get_pos()
-
-        # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not lost:
-            move = ai.make_safe_move()
-            if move is None:
-                move = ai.make_random_move()
-                if move is None:
-                    flags = ai.mines.copy()
-                    print("No moves left to make.")
-                else:
-                    print("No known safe moves, AI making random move.")
-            else:
-                print("AI making safe move.")
-            time.sleep(0.2)
-
-        # Reset game state
-        elif resetButton.collidepoint(mouse):
-            game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
-            revealed = set()
-            flags = set()
-            lost = False
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode(size)
+    clock = pygame.time.Clock()
+
+    # Fonts
+    OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
+    smallFont = pygame.font.Font(OPEN_SANS, 20)
+    mediumFont = pygame.font.Font(OPEN_SANS, 28)
+    largeFont = pygame.font.Font(OPEN_SANS, 40)
+
+    # Add images
+    flag = pygame.image.load("assets/images/flag.png")
+    flag = pygame.transform.scale(flag, (cell_size, cell_size))
+    mine = pygame.image.load("assets/images/mine.png")
+    mine = pygame.transform.scale(mine, (cell_size, cell_size))
+
+    # Rendered once, numbers are drawn on every revealed cell
+    numbers = [smallFont.render(str(n), True, BLACK) for n in range(9)]
+
+    # Buttons
+    buttonWidth = (width / 3) - BOARD_PADDING * 2
+    aiButton = pygame.Rect((2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 85,
+                           buttonWidth, 50)
+    fastButton = pygame.Rect((2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 15,
+                             buttonWidth, 50)
+    resetButton = pygame.Rect((2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 55,
+                              buttonWidth, 50)
+    panel = pygame.Rect((2 / 3) * width, 0, width / 3, height)
+
+    def new_game():
+        game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
+        ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
+        return game, AIWorker(game, ai)
+
+    def draw_cell(cell):
+        rect = cell_rect(cell)
+        pygame.draw.rect(screen, GRAY, rect)
+        pygame.draw.rect(screen, WHITE, rect, 3)
+
+        # Add a mine, flag, or number if needed
+        if lost and game.is_mine(cell):
+            screen.blit(mine, rect)
+        elif cell in flags:
+            screen.blit(flag, rect)
+        elif cell in revealed:
+            neighbors = numbers[revealed[cell]]
+            neighborsTextRect = neighbors.get_rect()
+            neighborsTextRect.center = rect.center
+            screen.blit(neighbors, neighborsTextRect)
+        return rect
+
+    game, worker = new_game()
+
+    # Revealed cells with their counts, flagged cells, and if a mine was hit
+    revealed = dict()
+    flags = set()
+    lost = False
+    fast_forward = False
+
+    # Cells to draw again this frame, everything when the board is new
+    dirty = set()
+    redraw = True
+
+    # Show instructions initially
+    instructions = True
+
+    while True:
+        clock.tick(FPS)
+
+        clicks = []
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                worker.close()
+                sys.exit()
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
+                clicks.append(event)
+
+        # Show game instructions
+        if instructions:
+            screen.fill(BLACK)
+
+            # Title
+            title = largeFont.render("Play Minesweeper", True, WHITE)
+            titleRect = title.get_rect()
+            titleRect.center = ((width / 2), 50)
+            screen.blit(title, titleRect)
+
+            # Rules
+            rules = [
+                "Click a cell to reveal it.",
+                "Right-click a cell to mark it as a mine.",
+                "Mark all mines successfully to win!"
+            ]
+            for i, rule in enumerate(rules):
+                line = smallFont.render(rule, True, WHITE)
+                lineRect = line.get_rect()
+                lineRect.center = ((width / 2), 150 + 30 * i)
+                screen.blit(line, lineRect)
+
+            # Play game button
+            buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
+            draw_button(screen, buttonRect, "Play Game", mediumFont)
+
+            # Check if play button clicked
+            for event in clicks:
+                if event.button == 1 and buttonRect.collidepoint(event.pos):
+                    instructions = False
+                    redraw = True
+
+            pygame.display.flip()
             continue
 
-        # User-made move
-        elif not lost:
+        for event in clicks:
+            cell = cell_at(event.pos)
+
+            # Right-click toggles flagging
+            if event.button == 3:
+                if cell is not None and not lost and cell not in revealed:
+                    flags.symmetric_difference_update({cell})
+                    dirty.add(cell)
+
+            # If AI button clicked, make an AI move
+            elif aiButton.collidepoint(event.pos):
+                if not lost and not worker.busy():
+                    worker.play(1)
+
+            # Fast forward plays many AI moves every frame until stopped
+            elif fastButton.collidepoint(event.pos):
+                fast_forward = not fast_forward and not lost
+
+            # Reset game state
+            elif resetButton.collidepoint(event.pos):
+                worker.close()
+                game, worker = new_game()
+                revealed = dict()
+                flags = set()
+                lost = False
+                fast_forward = False
+                redraw = True
+
+            # User-made move
+            elif cell is not None and not lost and cell not in flags and cell not in revealed:
+                worker.click(cell)
+
+        if fast_forward and not worker.busy():
+            worker.play(FAST_FORWARD_MOVES)
+
+        # Apply the moves the AI has made since the last frame
+        for result in worker.poll():
+            if result[0] == "opened":
+                _, opened, message = result
+                if message is not None and not fast_forward:
+                    print(message)
+                for cell, count in opened:
+                    revealed[cell] = count
+                    flags.discard(cell)
+                    dirty.add(cell)
+            elif result[0] == "lost":
+                lost = True
+                fast_forward = False
+                dirty.update(game.mines)
+            else:
+                print("No moves left to make.")
+                dirty.update(flags ^ result[1])
+                flags = result[1]
+                fast_forward = False
+
+        # Draw board, only the cells that changed unless it is new
+        updated = []
+        if redraw:
+            screen.fill(BLACK)
             for i in range(HEIGHT):
                 for j in range(WIDTH):
-                    if (cells[i][j].collidepoint(mouse)
-                            and (i, j) not in flags
-                            and (i, j) not in revealed):
-                        move = (i, j)
-
-    # Make move and update AI knowledge
-    if move:
-        if game.is_mine(move):
-            lost = True
+                    draw_cell((i, j))
+            updated.append(screen.get_rect())
+            redraw = False
         else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            updated.extend(draw_cell(cell) for cell in dirty)
+        dirty.clear()
+
+        # Side panel with the buttons and the result
+        screen.fill(BLACK, panel)
+        draw_button(screen, aiButton, "AI Move", mediumFont)
+        draw_button(screen, fastButton, "Pause" if fast_forward else "Fast Forward", smallFont)
+        draw_button(screen, resetButton, "Reset", mediumFont)
+
+        text = "Lost" if lost else "Won" if game.mines == flags else ""
+        text = mediumFont.render(text, True, WHITE)
+        textRect = text.get_rect()
+        textRect.center = ((5 / 6) * width, (2 / 3) * height)
+        screen.blit(text, textRect)
+        updated.append(panel)
+
+        pygame.display.update(updated)
+
 
-    pygame.display.flip()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Headless batch simulator for the Minesweeper AI.
+
+Plays seeded games of Minesweeper against MinesweeperAI in a process pool
+and prints win rate, moves per second, time per add_knowledge call and the
+size of the knowledge base over the game as JSON.
+
+Usage: python simulate.py [--games N] [--boards 8x8:8,16x16:40,...]
+                          [--density D] [--flood] [--workers N] [--seed S]
+                          [--output FILE]
+
+A board is HEIGHTxWIDTH:MINES; without :MINES, density * cells mines are used.
+With --flood, a move on a cell with no mines nearby opens its whole region,
+as in the usual game, and the AI is told about all of it in one batch.
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def play_game(job):
+    """
+    Plays one game the way runner.py's AI button does and returns its stats.
+    """
+    height, width, mines, flood, seed = job
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+
+    add_seconds = []
+    knowledge_sizes = []
+    lost = False
+    start = time.perf_counter()
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                break
+        if game.is_mine(move):
+            lost = True
+            break
+
+        before = time.perf_counter()
+        if flood:
+            ai.add_knowledge_batch(game.reveal(move))
+        else:
+            ai.add_knowledge(move, game.nearby_mines(move))
+        add_seconds.append(time.perf_counter() - before)
+        knowledge_sizes.append(len(ai.knowledge))
+
+    return {
+        "won": not lost and ai.mines == game.mines,
+        "moves": len(add_seconds),
+        "seconds": time.perf_counter() - start,
+        "add_seconds": add_seconds,
+        "knowledge_sizes": knowledge_sizes,
+    }
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of values using the nearest-rank method.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(0, min(len(values) - 1, round(p / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def summarize(games):
+    """
+    Summarises the games played on one board into a dictionary.
+    """
+    moves = sum(game["moves"] for game in games)
+    seconds = sum(game["seconds"] for game in games)
+    add_seconds = [s for game in games for s in game["add_seconds"]]
+
+    # Average knowledge size after each move, over the games still going
+    longest = max((len(game["knowledge_sizes"]) for game in games), default=0)
+    by_move = []
+    for i in range(longest):
+        sizes = [game["knowledge_sizes"][i] for game in games
+                 if i < len(game["knowledge_sizes"])]
+        by_move.append(sum(sizes) / len(sizes))
+
+    return {
+        "games": len(games),
+        "win_rate": sum(game["won"] for game in games) / len(games),
+        "moves": moves,
+        "moves_per_second": moves / seconds if seconds else None,
+        "add_knowledge_ms": {
+            "mean": sum(add_seconds) / len(add_seconds) * 1000 if add_seconds else None,
+            **{f"p{p}": (percentile(add_seconds, p) or 0) * 1000
+               for p in (50, 90, 99, 100)},
+        },
+        "knowledge_size": {
+            "max": max((max(game["knowledge_sizes"], default=0) for game in games), default=0),
+            "mean_by_move": by_move,
+        },
+    }
+
+
+def parse_board(text, density):
+    size, _, mines = text.partition(":")
+    height, width = (int(n) for n in size.split("x"))
+    mines = int(mines) if mines else round(density * height * width)
+    return height, width, mines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minesweeper AI simulator")
+    parser.add_argument("--games", type=int, default=100,
+                        help="games per board")
+    parser.add_argument("--boards", default="8x8:8",
+                        help="comma separated HEIGHTxWIDTH[:MINES] boards")
+    parser.add_argument("--density", type=float, default=0.125,
+                        help="fraction of cells that are mines, if not given")
+    parser.add_argument("--flood", action="store_true",
+                        help="open regions of zeros in one move")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes in the pool (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None,
+                        help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        boards = [parse_board(board, args.density) for board in args.boards.split(",")]
+    except ValueError:
+        sys.exit("Boards look like 8x8:8 or 16x30")
+
+    report = dict()
+    with multiprocessing.Pool(args.workers) as pool:
+        for height, width, mines in boards:
+            jobs = [(height, width, mines, args.flood, args.seed + i) for i in range(args.games)]
+            games = pool.map(play_game, jobs, chunksize=max(1, len(jobs) // 64))
+            report[f"{height}x{width}:{mines}"] = summarize(games)
+
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
+import itertools
+import numpy
 import os
-import random
 import re
 import sys
 
 DAMPING = 0.85
 SAMPLES = 10000
+TOLERANCE = 1e-8
+
+# Random surfers walked side by side when sampling, and the steps each takes
+# before its pages are counted, so where it started no longer matters
+SURFERS = 1000
+BURN_IN = 100
 
 
 def main():
@@ -72,7 +79,7 @@ def transition_model(corpus, page, damping_factor):
     return transition_prob
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, seed=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
@@ -80,21 +87,59 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
-    """
-    pagerank_total = dict.fromkeys(corpus.keys(), 0)
 
-    page = random.choice(list(corpus.keys()))
-    pagerank_total[page] += 1
-
-    for _ in range(n):
-        transition = transition_model(corpus, page, damping_factor)
-        page = random.choices(list(transition.keys()), weights=list(transition.values()), k=1)[0]
-        pagerank_total[page] += 1
+    Up to SURFERS surfers walk at once, each step moving all of them with
+    a few array operations: a coin flip decides whether each follows a
+    link or jumps to a random page, and a followed link is picked from
+    the page's slice of the link array. Give `seed` for the same samples
+    every time.
+    """
+    pages, indptr, links = link_arrays(corpus)
+    N = len(pages)
+    numlinks = numpy.diff(indptr)
+    rng = numpy.random.default_rng(seed)
+
+    def step(page):
+        # A page with no links sends the surfer to a random page
+        follow = (rng.random(len(page)) < damping_factor) & (numlinks[page] > 0)
+        next_page = rng.integers(N, size=len(page))
+        chosen = numlinks[page[follow]] * rng.random(follow.sum())
+        next_page[follow] = links[indptr[page[follow]] + chosen.astype(numpy.int64)]
+        return next_page
+
+    page = rng.integers(N, size=min(n, SURFERS))
+    for _ in range(BURN_IN):
+        page = step(page)
+
+    pagerank_total = numpy.zeros(N, dtype=numpy.int64)
+    remaining = n
+    while remaining > 0:
+        page = page[:remaining]
+        pagerank_total += numpy.bincount(page, minlength=N)
+        remaining -= len(page)
+        page = step(page)
+
+    return dict(zip(pages, (pagerank_total / n).tolist()))
+
+
+def link_arrays(corpus):
+    """
+    Return the corpus as arrays, with pages numbered by their position in
+    the returned list of page names.
 
-    return {key: value / n for key, value in pagerank_total.items()}
+    The links form a sparse matrix in CSR layout: the pages linked to by
+    page i are `links[indptr[i]:indptr[i + 1]]`.
+    """
+    pages = list(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    indptr = numpy.zeros(len(pages) + 1, dtype=numpy.int64)
+    indptr[1:] = numpy.cumsum([len(corpus[page]) for page in pages])
+    links = numpy.fromiter(map(index.get, itertools.chain.from_iterable(corpus.values())),
+                           dtype=numpy.int64, count=indptr[-1])
+    return pages, indptr, links
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -102,33 +147,34 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    The link matrix is built once, then every update is a sparse
+    matrix-vector product, repeated until the ranks change by less than
+    `tolerance` in total.
     """
-    N = len(corpus)
-    pagerank = dict.fromkeys(corpus.keys(), 1 / N)
-    damping_prob = (1 - damping_factor) / N
-
-    delta = dict.fromkeys(corpus.keys(), 1)
-    TOLERANCE = 0.001
-
-    while any(change >= TOLERANCE for change in list(delta.values())):
-        for page in corpus:
-            # List of pages to iterate for the summation
-            # if page has no links, treat as if it links to all pages - otherwise only links in page
-            i_set = [key for key, links in corpus.items() if len(links) == 0 or page in links]
-            # value of the summation
-            i_sum = 0
-
-            # perform summation
-            for i in i_set:
-                numlinks = len(corpus[i]) if len(corpus[i]) > 0 else N
-                i_sum += damping_factor * (pagerank[i] / numlinks)
-
-            # finish equation
-            cur_rank = damping_prob + i_sum
-            delta[page] = abs(pagerank[page] - cur_rank)
-            pagerank[page] = cur_rank
-
-    return pagerank
+    pages, indptr, links = link_arrays(corpus)
+    N = len(pages)
+    numlinks = numpy.diff(indptr)
+
+    # A page with no links is treated as linking to all pages, so its rank
+    # is spread over every page instead of being stored as N links
+    dangling = numlinks == 0
+
+    # Each link carries its page's rank divided by the page's number of links
+    sources = numpy.repeat(numpy.arange(N), numlinks)
+    weights = damping_factor / numlinks[sources]
+
+    pagerank = numpy.full(N, 1 / N)
+    while True:
+        spread = ((1 - damping_factor) + damping_factor * pagerank[dangling].sum()) / N
+        new_rank = spread + numpy.bincount(links, weights=pagerank[sources] * weights,
+                                           minlength=N)
+        change = numpy.abs(new_rank - pagerank).sum()
+        pagerank = new_rank
+        if change < tolerance:
+            break
+
+    return dict(zip(pages, pagerank.tolist()))
 
 
 if __name__ == "__main__":